@@ -0,0 +1,5 @@
+# Retirement planner models: data ingestion, GBP conversion, money market accrual,
+# Monte Carlo simulation of asset returns and mean-variance frontier analysis.
+#
+# Run `python -m retirement_planner --help` for the command line interface. Submodules are
+# imported on demand, so importing the package itself does not load numpy, pandas or matplotlib.
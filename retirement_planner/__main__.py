@@ -0,0 +1,3 @@
+from retirement_planner.cli import main
+
+main()
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+from retirement_planner.data import num_months_in_year
+from retirement_planner.path_index import total_loss_floor
+
+# Rolling-cohort backtest: every model portfolio invested from every historical start month of the
+# GBP panel, for every horizon, all at once.
+#
+# With L[t] the cumulative log wealth of a monthly rebalanced portfolio after t months (L[0] = 0), the
+# cohort starting at s with horizon h has
+#   - log growth L[s+h] - L[s]
+#   - maximum drawdown min_{s<t<=s+h} L[t] - max_{s<=u<=t} L[u], from a running max masked to start at s
+#     and a running min of the drawdowns, read at t = s+h
+#   - withdrawal success in O(1): with C[t] = sum_{k<t} exp(-L[k]), a monthly withdrawal m taken at the
+#     start of each month (as a share of starting wealth 1) lasts the horizon iff 1 > m exp(L[s]) (C[s+h] - C[s])
+# Cells whose window runs past the end of the history are NaN.
+
+def cumulative_log_wealth(monthly_returns, weights):
+    """
+    (months + 1) x portfolios cumulative log wealth of monthly rebalanced portfolios, starting at 0.
+    """
+    portfolio_returns = np.asarray(monthly_returns, dtype=np.float64) @ np.asarray(weights, dtype=np.float64).T
+    log_wealth = np.zeros((portfolio_returns.shape[0] + 1, portfolio_returns.shape[1]))
+    np.cumsum(np.log1p(np.maximum(portfolio_returns, total_loss_floor)), axis=0, out=log_wealth[1:])
+    return log_wealth
+
+def rolling_backtest(monthly_returns_df, weights, horizons=None, withdrawal_rate: float = 0.0):
+    """
+    Backtests a (portfolios x assets) weight matrix from every start month for every horizon (in months,
+    default 1 to the length of the history). Returns a dict of (starts x horizons x portfolios) cubes:
+    annualized_return, max_drawdown, terminal_wealth (after withdrawals) and success (1.0 / 0.0), plus the
+    start dates and horizons that index them.
+    """
+    log_wealth = cumulative_log_wealth(monthly_returns_df.to_numpy(dtype=np.float64), weights)
+    num_months = log_wealth.shape[0] - 1
+    horizons = np.arange(1, num_months + 1) if horizons is None else np.asarray(horizons, dtype=np.int64)
+    if horizons.min() < 1:
+        raise ValueError("Horizons must be at least one month.")
+
+    starts = np.arange(num_months)
+    end_months = starts[:, None] + horizons[None, :]                   # (starts x horizons)
+    valid = end_months <= num_months
+    end_months = np.minimum(end_months, num_months)
+    start_log_wealth = log_wealth[starts][:, None, :]                  # (starts x 1 x portfolios)
+    end_log_wealth = log_wealth[end_months]                           # (starts x horizons x portfolios)
+
+    log_growth = end_log_wealth - start_log_wealth
+    annualized_return = np.expm1(log_growth * (num_months_in_year / horizons[None, :, None]))
+
+    # Running peak from each start month onwards, then the running worst drawdown: (starts x months + 1 x portfolios)
+    months = np.arange(num_months + 1)
+    before_start = months[None, :] < starts[:, None]
+    peaks = np.maximum.accumulate(np.where(before_start[:, :, None], -np.inf, log_wealth[None, :, :]), axis=1)
+    drawdowns = np.where(before_start[:, :, None], 0.0, log_wealth[None, :, :] - peaks)
+    worst_drawdowns = np.minimum.accumulate(drawdowns, axis=1)
+    max_drawdown = np.expm1(np.take_along_axis(worst_drawdowns, end_months[:, :, None], axis=1))
+
+    growth = np.exp(log_growth)
+    if withdrawal_rate > 0:
+        monthly_withdrawal = withdrawal_rate / num_months_in_year
+        discount_sums = np.zeros_like(log_wealth)
+        np.cumsum(np.exp(-log_wealth[:-1]), axis=0, out=discount_sums[1:])
+        remaining_share = 1 - monthly_withdrawal * np.exp(start_log_wealth) * (discount_sums[end_months] - discount_sums[starts][:, None, :])
+        success = (remaining_share > 0).astype(np.float64)
+        terminal_wealth = growth * np.maximum(remaining_share, 0.0)
+    else:
+        success = np.ones_like(growth)
+        terminal_wealth = growth
+
+    invalid = ~valid[:, :, None]
+    cube = {'annualized_return': annualized_return, 'max_drawdown': max_drawdown, 'terminal_wealth': terminal_wealth, 'success': success}
+    for values in cube.values():
+        values[np.broadcast_to(invalid, values.shape)] = np.nan
+    cube['start_dates'] = monthly_returns_df.index[starts]
+    cube['horizons'] = horizons
+    return cube
+
+def summarise_backtest(cube: dict, portfolio_names: list, horizons=None):
+    """
+    One row per (portfolio, horizon): number of complete cohorts, worst / median annualized return,
+    worst maximum drawdown and the share of cohorts whose withdrawals lasted.
+    """
+    horizon_positions = range(len(cube['horizons'])) if horizons is None else [list(cube['horizons']).index(h) for h in horizons]
+    rows = []
+    for p, portfolio_name in enumerate(portfolio_names):
+        for h in horizon_positions:
+            annualized = cube['annualized_return'][:, h, p]
+            complete = ~np.isnan(annualized)
+            if not complete.any():
+                continue
+            rows.append({'Portfolio': portfolio_name, 'Horizon_Months': int(cube['horizons'][h]), 'Cohorts': int(complete.sum()),
+                         'Worst_Ann_Return': annualized[complete].min(), 'Median_Ann_Return': np.median(annualized[complete]),
+                         'Worst_Max_Drawdown': cube['max_drawdown'][complete, h, p].min(),
+                         'Success_Rate': cube['success'][complete, h, p].mean()})
+    return pd.DataFrame(rows).set_index(['Portfolio', 'Horizon_Months'])
@@ -0,0 +1,137 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+from retirement_planner.evaluate import default_memory_budget, default_percentiles, evaluate_portfolios
+
+# Memoization of portfolio evaluations on the simulation store.
+# Results are cached per portfolio under (data hash, quantized weights, parameters), so a batch that
+# repeats weights seen before (the query service's interactive what-ifs) only evaluates the new ones. The rounded weights (weight_decimals places) are only the key: a miss evaluates the caller's
+# exact weights, and later vectors that round to the same key share that entry.
+# Entries are evicted least recently used first once the memory budget is exceeded. With a spill folder
+# evicted entries are written there as .npz files and reloaded on a later miss.
+
+default_cache_budget = 64 * 1024**2
+default_weight_decimals = 4
+# Rough per-entry overhead of the key, dict and array headers on top of the array data
+entry_overhead_bytes = 512
+
+def store_data_hash(simulated_asset_paths: dict, asset_names: list, memory_budget: int = default_memory_budget) -> str:
+    """
+    sha256 of every asset's simulated paths, read in row chunks so memory-mapped stores are never fully loaded.
+    """
+    digest = hashlib.sha256(repr(asset_names).encode())
+    for asset_name in asset_names:
+        asset_paths = simulated_asset_paths[asset_name]
+        digest.update(repr(asset_paths.shape).encode())
+        rows_per_chunk = max(1, memory_budget // (8 * asset_paths.shape[1]))
+        for start in range(0, asset_paths.shape[0], rows_per_chunk):
+            digest.update(np.ascontiguousarray(asset_paths[start:start + rows_per_chunk], dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+class PortfolioCache:
+    """
+    Thread-safe LRU cache of per-portfolio results with a memory budget, optional disk spill and hit / miss counters.
+    """
+
+    def __init__(self, memory_budget: int = default_cache_budget, spill_folder: str = None, weight_decimals: int = default_weight_decimals):
+        self.memory_budget = memory_budget
+        self.spill_folder = spill_folder
+        self.weight_decimals = weight_decimals
+        self.entries = OrderedDict()
+        self.memory_used = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+        if spill_folder:
+            os.makedirs(spill_folder, exist_ok=True)
+
+    def quantize(self, weights):
+        return np.round(np.asarray(weights, dtype=np.float64), self.weight_decimals) + 0.0   # + 0.0 turns -0.0 into 0.0
+
+    def make_key(self, data_hash: str, quantized_weights, parameters: tuple):
+        return (data_hash, quantized_weights.tobytes(), parameters)
+
+    def spill_file(self, key) -> str:
+        return os.path.join(self.spill_folder, hashlib.sha256(repr(key).encode()).hexdigest() + '.npz')
+
+    @staticmethod
+    def entry_size(value: dict) -> int:
+        return entry_overhead_bytes + sum(np.asarray(array).nbytes for array in value.values())
+
+    def get(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            if self.spill_folder and os.path.exists(self.spill_file(key)):
+                with np.load(self.spill_file(key)) as spilled:
+                    value = {name: spilled[name] for name in spilled.files}
+                self.disk_hits += 1
+                self._insert(key, value)
+                return value
+            self.misses += 1
+            return None
+
+    def put(self, key, value: dict):
+        with self.lock:
+            if key in self.entries:
+                self.memory_used -= self.entry_size(self.entries.pop(key))
+            self._insert(key, value)
+
+    def _insert(self, key, value: dict):
+        self.entries[key] = value
+        self.memory_used += self.entry_size(value)
+        while self.memory_used > self.memory_budget and len(self.entries) > 1:
+            evicted_key, evicted_value = self.entries.popitem(last=False)
+            self.memory_used -= self.entry_size(evicted_value)
+            self.evictions += 1
+            if self.spill_folder and not os.path.exists(self.spill_file(evicted_key)):
+                np.savez(self.spill_file(evicted_key), **evicted_value)
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {'entries': len(self.entries), 'memory_used': self.memory_used, 'hits': self.hits,
+                    'disk_hits': self.disk_hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0}
+
+def cached_evaluate_portfolios(cache: PortfolioCache, data_hash: str, simulated_asset_paths: dict, asset_names: list, weights,
+                               horizon_months: int = None, withdrawal_rate: float = 0.0, percentiles=default_percentiles,
+                               memory_budget: int = default_memory_budget):
+    """
+    evaluate_portfolios with per-portfolio memoization: looks every weight vector up in the cache under its
+    quantized key, evaluates the exact weights of the misses in one batched pass and returns the same dict as evaluate_portfolios.
+    data_hash identifies the store, e.g. from store_data_hash.
+    """
+    percentiles = [float(p) for p in percentiles]
+    if horizon_months is None:
+        horizon_months = simulated_asset_paths[asset_names[0]].shape[1]
+    parameters = (tuple(asset_names), int(horizon_months), float(withdrawal_rate), tuple(percentiles))
+    weights = np.atleast_2d(np.asarray(weights, dtype=np.float64))
+
+    keys = [cache.make_key(data_hash, row, parameters) for row in cache.quantize(weights)]
+    rows = [cache.get(key) for key in keys]
+    missing = [i for i, row in enumerate(rows) if row is None]
+    if missing:
+        # Vectors sharing a key within the batch are evaluated once, with the first one's weights
+        first_missing = {}
+        for i in missing:
+            first_missing.setdefault(keys[i], i)
+        unique_missing = list(first_missing.values())
+        results = evaluate_portfolios(simulated_asset_paths, asset_names, weights[unique_missing], horizon_months,
+                                      withdrawal_rate, percentiles, memory_budget)
+        computed = {}
+        for position, i in enumerate(unique_missing):
+            computed[keys[i]] = {name: value[position] for name, value in results.items() if isinstance(value, np.ndarray)}
+            cache.put(keys[i], computed[keys[i]])
+        for i in missing:
+            rows[i] = computed[keys[i]]
+
+    combined = {'percentiles': percentiles}
+    combined.update({name: np.stack([row[name] for row in rows]) for name in rows[0]})
+    return combined
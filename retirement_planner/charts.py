@@ -0,0 +1,131 @@
+import numpy as np
+import pandas as pd
+from retirement_planner.data import num_months_in_year
+from retirement_planner.evaluate import asset_returns_chunk, chunk_size_for_budget
+from retirement_planner.frontier import random_portfolio_weights
+from retirement_planner.path_index import total_loss_floor
+
+# Headless charts rendered straight to files from pre-aggregated data.
+#  - Frontier clouds are 2D histograms of (volatility, return) accumulated chunk by chunk, so a million
+#    random portfolios cost a fixed-size grid of counts instead of a million scatter points.
+#  - Fan charts are drawn from wealth percentiles at the reporting months, read from fixed-size histograms
+#    filled in one pass over the store, never from the raw paths.
+# Aggregation only needs numpy / pandas; matplotlib is imported with the Agg backend when rendering.
+
+default_fan_percentiles = (5, 10, 25, 50, 75, 90, 95)
+# Log wealth grid for the fan chart histograms: wealth from e^-10 to e^10 in steps of 0.1%
+fan_log_wealth_range = (-10.0, 10.0, 20000)
+
+def frontier_density(expected_returns_annualized, covariance_matrix_annualized, num_portfolios: int = 1000000,
+                     bins: int = 200, chunk_size: int = 100000, seed=None):
+    """
+    Histogram of random long-only portfolios over (volatility, return), plus the best return seen in each
+    volatility column (the approximate efficient frontier). Memory is bounded by chunk_size.
+
+    The grid is fixed before any portfolio is drawn: long-only returns lie between the lowest and highest
+    asset return and volatility cannot exceed the highest asset volatility.
+    """
+    expected_returns = np.asarray(expected_returns_annualized, dtype=np.float64)
+    covariance = np.asarray(covariance_matrix_annualized, dtype=np.float64)
+    volatility_edges = np.linspace(0.0, np.sqrt(np.diag(covariance)).max(), bins + 1)
+    return_edges = np.linspace(expected_returns.min(), expected_returns.max(), bins + 1)
+
+    counts = np.zeros((bins, bins), dtype=np.int64)
+    frontier_returns = np.full(bins, -np.inf)
+    rng = np.random.default_rng(seed)
+    for start in range(0, num_portfolios, chunk_size):
+        weights = random_portfolio_weights(rng, min(chunk_size, num_portfolios - start), len(expected_returns))
+        p_returns = weights @ expected_returns
+        p_volatilities = np.sqrt(np.einsum('pi,ij,pj->p', weights, covariance, weights))
+
+        chunk_counts, _, _ = np.histogram2d(p_volatilities, p_returns, bins=[volatility_edges, return_edges])
+        counts += chunk_counts.astype(np.int64)
+        volatility_bins = np.clip(np.digitize(p_volatilities, volatility_edges) - 1, 0, bins - 1)
+        np.maximum.at(frontier_returns, volatility_bins, p_returns)
+
+    return {'counts': counts, 'volatility_edges': volatility_edges, 'return_edges': return_edges,
+            'frontier_returns': np.where(np.isfinite(frontier_returns), frontier_returns, np.nan)}
+
+def fan_chart_quantiles(simulated_asset_paths: dict, asset_names: list, weights, percentiles=default_fan_percentiles,
+                        step_months: int = num_months_in_year, memory_budget: int = 256 * 1024**2):
+    """
+    Wealth percentiles of a monthly rebalanced portfolio (starting wealth 1) every step_months.
+
+    Reads the store once in row chunks sized to memory_budget, each chunk covering every month, and adds
+    each path's log wealth at the reporting months to one fixed-edge histogram per reporting month, so memory
+    does not grow with the number of paths. Percentiles are read from the histograms at the end (bins are 0.1%
+    of wealth apart; in sparse tails the interpolation between paths adds a little more). Returns a DataFrame indexed by month, one column per percentile.
+    """
+    from retirement_planner.summaries import HistogramSketch
+    weights = np.asarray(weights, dtype=np.float64)
+    num_simulations, num_months = simulated_asset_paths[asset_names[0]].shape
+    rows_per_chunk = chunk_size_for_budget(num_months, 1, len(asset_names), memory_budget)
+    report_months = [month for month in range(1, num_months + 1) if month % step_months == 0 or month == num_months]
+    report_positions = np.array(report_months) - 1
+
+    log_wealth_sketch = HistogramSketch(len(report_months), *fan_log_wealth_range)
+    for row_start in range(0, num_simulations, rows_per_chunk):
+        row_stop = min(row_start + rows_per_chunk, num_simulations)
+        block = asset_returns_chunk(simulated_asset_paths, asset_names, row_start, row_stop, num_months)
+        log_wealth = np.cumsum(np.log1p(np.maximum(block @ weights, total_loss_floor)), axis=1)
+        log_wealth_sketch.update(log_wealth[:, report_positions])
+
+    quantiles = np.vstack([np.ones(len(percentiles)), np.exp(log_wealth_sketch.quantiles(percentiles))])
+    return pd.DataFrame(quantiles, index=pd.Index([0] + report_months, name='Month'), columns=list(percentiles))
+
+def _pyplot():
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+def render_frontier_density(density: dict, output_file: str, title: str = 'Random Portfolios - Efficient Frontier (Annualized)'):
+    from matplotlib.colors import LogNorm
+    plt = _pyplot()
+
+    counts = np.ma.masked_equal(density['counts'].T, 0)
+    volatility_edges, return_edges = density['volatility_edges'], density['return_edges']
+    fig, ax = plt.subplots(figsize=(10, 6))
+    mesh = ax.pcolormesh(volatility_edges, return_edges, counts, cmap='viridis', norm=LogNorm(), shading='flat')
+    fig.colorbar(mesh, ax=ax, label='Portfolios per bin')
+    volatility_centres = (volatility_edges[:-1] + volatility_edges[1:]) / 2
+    ax.plot(volatility_centres, density['frontier_returns'], color='red', linewidth=2, label='Efficient Frontier')
+
+    # Zoom to the occupied part of the fixed grid
+    occupied_volatility = np.nonzero(density['counts'].sum(axis=1))[0]
+    occupied_return = np.nonzero(density['counts'].sum(axis=0))[0]
+    if len(occupied_volatility):
+        ax.set_xlim(volatility_edges[occupied_volatility[0]], volatility_edges[occupied_volatility[-1] + 1])
+        ax.set_ylim(return_edges[occupied_return[0]], return_edges[occupied_return[-1] + 1])
+    ax.set_title(title)
+    ax.set_xlabel('Annualized Volatility (Standard Deviation)')
+    ax.set_ylabel('Annualized Return')
+    ax.grid(True)
+    ax.legend()
+    fig.savefig(output_file, dpi=150)
+    plt.close(fig)
+    print(f"Saved frontier density chart to {output_file}")
+
+def render_fan_chart(quantiles_df, output_file: str, title: str = 'Simulated Wealth Percentiles'):
+    plt = _pyplot()
+
+    years = quantiles_df.index.to_numpy() / num_months_in_year
+    percentiles = list(quantiles_df.columns)
+    fig, ax = plt.subplots(figsize=(10, 6))
+    # Shade symmetric bands from the outside in, e.g. 5-95, 10-90, 25-75
+    for band in range(len(percentiles) // 2):
+        lower, upper = percentiles[band], percentiles[-band - 1]
+        ax.fill_between(years, quantiles_df[lower], quantiles_df[upper], color='tab:blue',
+                        alpha=0.15 + 0.15 * band, linewidth=0, label=f"{lower:g}th - {upper:g}th percentile")
+    if len(percentiles) % 2:
+        median = percentiles[len(percentiles) // 2]
+        ax.plot(years, quantiles_df[median], color='navy', linewidth=2, label=f"{median:g}th percentile")
+    ax.set_yscale('log')
+    ax.set_title(title)
+    ax.set_xlabel('Years')
+    ax.set_ylabel('Wealth (starting wealth = 1)')
+    ax.grid(True, which='both', alpha=0.3)
+    ax.legend(loc='upper left')
+    fig.savefig(output_file, dpi=150)
+    plt.close(fig)
+    print(f"Saved fan chart to {output_file}")
@@ -0,0 +1,380 @@
+import argparse
+from retirement_planner import data
+
+# Single command line entry point: python -m retirement_planner <command>
+# Each command imports the modules it needs inside its handler, so e.g. `accrue` never loads
+# pandas or matplotlib and `simulate` never loads yfinance or scipy.
+
+default_start_date = "2010-11-01"
+default_end_date = "2025-06-21"
+
+def run_ingest(args):
+    from retirement_planner.ingest import ingest_all
+    ingest_all(args.tickers + [data.GBP_to_USD], args.start, args.end)
+
+def run_convert(args):
+    from retirement_planner.convert import convert_all
+    convert_all(args.tickers)
+
+def run_accrue(args):
+    from datetime import datetime
+    from retirement_planner.accrue import accrue_moneymarket_returns
+    accrue_moneymarket_returns(datetime.strptime(args.start, '%Y-%m-%d'), datetime.strptime(args.end, '%Y-%m-%d'))
+
+def launch_local_shards(args):
+    """
+    Runs every shard as a separate local process (a stand-in for separate nodes), then merges their summaries.
+    """
+    import subprocess
+    import sys
+    import numpy as np
+    seed = args.seed if args.seed is not None else np.random.SeedSequence().entropy
+    print(f"Launching {args.num_shards} shard processes with seed {seed}")
+    command = [sys.executable, '-m', 'retirement_planner', 'simulate', '--method', args.method, '--dof', str(args.dof),
+               '--simulations', str(args.simulations), '--years', str(args.years), '--chunk-size', str(args.chunk_size),
+               '--seed', str(seed), '--output', args.output, '--num-shards', str(args.num_shards)]
+    if not args.resume:
+        command.append('--no-resume')
+    processes = [subprocess.Popen(command + ['--shard', str(shard)], stdout=subprocess.DEVNULL) for shard in range(args.num_shards)]
+    failed = [shard for shard, process in enumerate(processes) if process.wait() != 0]
+    if failed:
+        raise SystemExit(f"Shards {failed} failed. Rerun them with --shard to resume from their checkpoints.")
+    merge_shards(args.output)
+
+def merge_shards(output_folder: str, merged_file: str = None):
+    import glob
+    import os
+    import pandas as pd
+    from retirement_planner.simulate import shard_folder_prefix
+    from retirement_planner.summaries import merge_summaries, summaries_filename
+    summary_files = sorted(glob.glob(os.path.join(output_folder, shard_folder_prefix + '*', summaries_filename)))
+    merged = merge_summaries(summary_files)
+    print(f"\nMerged {len(summary_files)} shards: {merged.num_simulations} simulations")
+    with pd.option_context('display.max_columns', None, 'display.width', 200):
+        print(merged.table())
+    merged_file = merged_file or os.path.join(output_folder, summaries_filename)
+    merged.save(merged_file)
+    print(f"Saved merged summaries to {merged_file}")
+
+def run_merge(args):
+    merge_shards(args.store, args.output)
+
+def run_simulate(args):
+    from retirement_planner.simulate import simulate_paths, simulate_shard
+    if args.num_shards > args.simulations:
+        raise SystemExit(f"--num-shards ({args.num_shards}) cannot be more than --simulations ({args.simulations}).")
+    if args.num_shards > 1 and args.shard is None:
+        if not args.launch_local:
+            raise SystemExit("Pass --shard K to run one shard, or --launch-local to run all of them as local processes.")
+        launch_local_shards(args)
+        return
+    combined_monthly_returns_gbp = data.load_gbp_returns()
+
+    planning_horizon_months = args.years * data.num_months_in_year
+    if args.method in ('bootstrap', 'regime_rate', 'regime_volatility') and len(combined_monthly_returns_gbp) < planning_horizon_months:
+        print(f"\nWarning: Number of historical months ({len(combined_monthly_returns_gbp)}) is less than the planning horizon in months ({planning_horizon_months}).")
+        print("This means some simulated paths will reuse historical months more frequently than others.")
+
+    print(f"\n--- Running {args.simulations} Monte Carlo Simulations ({args.years} years horizon, method '{args.method}') ---")
+    if args.shard is not None:
+        output_folder = simulate_shard(combined_monthly_returns_gbp, args.simulations, planning_horizon_months, args.output,
+                                       args.shard, args.num_shards, args.method, args.dof, args.chunk_size, args.seed, args.resume)
+    else:
+        output_folder = args.output
+        simulate_paths(combined_monthly_returns_gbp, args.simulations, planning_horizon_months, output_folder,
+                       args.method, args.dof, args.chunk_size, args.seed, args.resume)
+    print(f"\nAll simulated asset paths saved to the '{output_folder}' folder.")
+
+    if args.build_index:
+        from retirement_planner.path_index import build_asset_indexes
+        build_asset_indexes(output_folder)
+
+def parse_weights(items: list) -> dict:
+    """
+    Parses ASSET=WEIGHT pairs from the command line, e.g. AGG=0.4 IWDA.L=0.6.
+    """
+    weights = {}
+    for item in items:
+        asset_name, separator, weight = item.rpartition('=')
+        if not separator:
+            raise SystemExit(f"Expected ASSET=WEIGHT, got '{item}'")
+        weights[asset_name] = float(weight)
+    return weights
+
+def run_frontier(args):
+    from retirement_planner.frontier import run_frontier as compute_frontier, plot_efficient_frontier
+    combined_monthly_returns_gbp = data.load_gbp_returns()
+    portfolios_df, efficient_frontier = compute_frontier(combined_monthly_returns_gbp, args.portfolios, args.seed)
+    if args.plot_file:
+        from retirement_planner.charts import frontier_density, render_frontier_density
+        from retirement_planner.simulate import annualized_inputs
+        density = frontier_density(*annualized_inputs(combined_monthly_returns_gbp), args.portfolios, seed=args.seed)
+        render_frontier_density(density, args.plot_file)
+    elif args.plot:
+        plot_efficient_frontier(portfolios_df, efficient_frontier)
+
+def run_report(args):
+    from retirement_planner import report
+    if args.historical:
+        report.historical_report(data.load_gbp_returns(data.risky_asset_classes), args.windows)
+    if args.store:
+        historical_returns_df = data.load_gbp_returns() if args.compare_historical else None
+        portfolios = {'Portfolio': parse_weights(args.weights)} if args.weights else None
+        report.simulated_report(args.store, args.window_years, int(args.memory_mb * 1024**2), historical_returns_df, portfolios)
+    if args.frontier_chart:
+        from retirement_planner.charts import frontier_density, render_frontier_density
+        from retirement_planner.simulate import annualized_inputs
+        density = frontier_density(*annualized_inputs(data.load_gbp_returns()), args.portfolios, seed=args.seed)
+        render_frontier_density(density, args.frontier_chart)
+    if args.fan_chart:
+        from retirement_planner.charts import fan_chart_quantiles, render_fan_chart
+        from retirement_planner.evaluate import weights_matrix
+        from retirement_planner.store import list_simulated_assets, load_simulated_paths
+        store = args.store or data.simulated_paths_folder
+        asset_names = list_simulated_assets(store)
+        weights = weights_matrix(parse_weights(args.weights), asset_names)[0]
+        quantiles_df = fan_chart_quantiles(load_simulated_paths(store, asset_names, mmap_mode='r'), asset_names, weights)
+        if args.quantiles_file:
+            quantiles_df.to_csv(args.quantiles_file)
+            print(f"Saved wealth percentiles to {args.quantiles_file}")
+        render_fan_chart(quantiles_df, args.fan_chart)
+
+def run_serve(args):
+    from retirement_planner.service import serve
+    serve(args.store, args.host, args.port, args.batch_window_ms / 1000, int(args.cache_mb * 1024**2), args.cache_dir)
+
+def run_optimize(args):
+    from retirement_planner.optimize import risk_band_portfolios
+    from retirement_planner.store import list_simulated_assets, load_simulated_paths
+    asset_names = list_simulated_assets(args.store)
+    simulated_asset_paths = load_simulated_paths(args.store, asset_names, mmap_mode='r')
+    model_portfolios = risk_band_portfolios(simulated_asset_paths, asset_names, confidence=args.confidence,
+                                            horizon_months=args.horizon_months, max_scenarios=args.scenarios,
+                                            drawdown_paths=args.drawdown_paths, drawdown_months=args.drawdown_months,
+                                            max_weight=args.max_weight, seed=args.seed)
+    print("\nModel portfolios by risk level:")
+    print(model_portfolios)
+    if args.output:
+        model_portfolios.to_csv(args.output)
+        print(f"Saved model portfolios to {args.output}")
+
+def load_portfolios(args, asset_names: list):
+    """
+    Portfolio names and (portfolios x assets) weights from --weights or a --model-portfolios CSV saved by optimize.
+    """
+    import pandas as pd
+    from retirement_planner.evaluate import weights_matrix
+    if args.weights:
+        return ['Portfolio'], weights_matrix([parse_weights(args.weights)], asset_names)
+    if args.model_portfolios:
+        model_portfolios = pd.read_csv(args.model_portfolios, index_col=0)
+        portfolio_names = [f"{model_portfolios.index.name} {level}" for level in model_portfolios.index]
+        return portfolio_names, weights_matrix(model_portfolios.reindex(columns=asset_names, fill_value=0.0).to_dict('records'), asset_names)
+    raise SystemExit("Pass --model-portfolios (a CSV from the optimize command) or --weights.")
+
+def run_rebalance(args):
+    import pandas as pd
+    from retirement_planner.rebalance import compare_rebalancing_policies
+    from retirement_planner.store import list_simulated_assets, load_simulated_paths
+    asset_names = list_simulated_assets(args.store)
+    simulated_asset_paths = load_simulated_paths(args.store, asset_names, mmap_mode='r')
+    portfolio_names, weights = load_portfolios(args, asset_names)
+    horizon_months = None if args.horizon_years is None else args.horizon_years * data.num_months_in_year
+    comparison = compare_rebalancing_policies(simulated_asset_paths, asset_names, weights, args.policies, args.cost,
+                                              horizon_months, portfolio_names, backend=args.backend)
+    with pd.option_context('display.max_rows', None, 'display.max_columns', None, 'display.width', 200):
+        print(comparison)
+    if args.output:
+        comparison.to_csv(args.output)
+        print(f"Saved rebalancing comparison to {args.output}")
+
+def run_backtest(args):
+    import numpy as np
+    import pandas as pd
+    from retirement_planner.backtest import rolling_backtest, summarise_backtest
+    combined_monthly_returns_gbp = data.load_gbp_returns()
+    portfolio_names, weights = load_portfolios(args, list(combined_monthly_returns_gbp.columns))
+    cube = rolling_backtest(combined_monthly_returns_gbp, weights, withdrawal_rate=args.withdrawal_rate)
+    print(f"\nBacktest cube (start months x horizons x portfolios): {cube['success'].shape}")
+    longest_years = len(cube['horizons']) // data.num_months_in_year
+    dropped = [years for years in args.horizon_years if years > longest_years]
+    horizons = [years * data.num_months_in_year for years in args.horizon_years if years <= longest_years]
+    if not horizons:
+        raise ValueError(f"No requested horizon fits the {len(cube['horizons'])} month history. The longest that fits is {longest_years} years.")
+    if dropped:
+        print(f"Warning: skipping horizons longer than the history ({longest_years} years): {dropped}")
+    summary = summarise_backtest(cube, portfolio_names, horizons)
+    with pd.option_context('display.max_rows', None, 'display.max_columns', None, 'display.width', 200):
+        print(summary)
+    if args.output:
+        summary.to_csv(args.output)
+        print(f"Saved backtest summary to {args.output}")
+    if args.cube_file:
+        np.savez(args.cube_file, portfolios=np.array(portfolio_names), start_dates=cube['start_dates'].strftime('%Y-%m').to_numpy(),
+                 **{name: values for name, values in cube.items() if name != 'start_dates'})
+        print(f"Saved backtest cube to {args.cube_file}")
+
+def run_glidepath(args):
+    import pandas as pd
+    from retirement_planner.glidepath import candidate_glide_paths, compare_glide_paths, target_volatility_portfolios
+    from retirement_planner.store import list_simulated_assets, load_simulated_paths
+    asset_names = list_simulated_assets(args.store)
+    simulated_asset_paths = load_simulated_paths(args.store, asset_names, mmap_mode='r')
+    if args.model_portfolios:
+        level_portfolios = pd.read_csv(args.model_portfolios, index_col=0)
+    else:
+        from retirement_planner.simulate import annualized_inputs
+        print(f"Using the best of {args.portfolios} random portfolios at each risk level's target volatility")
+        level_portfolios = target_volatility_portfolios(*annualized_inputs(data.load_gbp_returns()), num_portfolios=args.portfolios, seed=args.seed)
+    level_weights = {int(level): row for level, row in zip(level_portfolios.index, level_portfolios.reindex(columns=asset_names, fill_value=0.0).to_numpy())}
+
+    store_months = simulated_asset_paths[asset_names[0]].shape[1]
+    num_months = store_months if args.years is None else args.years * data.num_months_in_year
+    descriptions, schedules = candidate_glide_paths(level_weights, num_months, args.start_levels, args.end_levels, args.glide_years,
+                                                    args.derisk_start_years, args.shapes)
+    print(f"Evaluating {len(schedules)} glide paths over {num_months} months")
+    outcomes = compare_glide_paths(simulated_asset_paths, asset_names, descriptions, schedules, args.withdrawal_rate)
+    outcomes = outcomes.sort_values(['Success_Probability', 'Wealth_P50'], ascending=False)
+    with pd.option_context('display.max_columns', None, 'display.width', 200):
+        print(outcomes.head(args.top).to_string(index=False))
+    if args.output:
+        outcomes.to_csv(args.output, index=False)
+        print(f"Saved glide path outcomes to {args.output}")
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be a positive whole number, got {value}")
+    return number
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='retirement_planner', description="Retirement planner models")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ingest = commands.add_parser('ingest', help="Download prices from Yahoo Finance and save monthly returns")
+    ingest.add_argument('--tickers', nargs='+', default=data.ticker_symbol_list)
+    ingest.add_argument('--start', default=default_start_date)
+    ingest.add_argument('--end', default=default_end_date)
+    ingest.set_defaults(handler=run_ingest)
+
+    convert = commands.add_parser('convert', help="Convert USD monthly returns to GBP")
+    convert.add_argument('--tickers', nargs='+', default=data.asset_tickers_to_convert)
+    convert.set_defaults(handler=run_convert)
+
+    accrue = commands.add_parser('accrue', help="Accrue BoE base rate into monthly money market returns")
+    accrue.add_argument('--start', default='2010-12-01')
+    accrue.add_argument('--end', default='2025-06-30')
+    accrue.set_defaults(handler=run_accrue)
+
+    simulate = commands.add_parser('simulate', help="Monte Carlo simulation of monthly GBP returns")
+    simulate.add_argument('--method', choices=['bootstrap', 'normal', 't', 'regime_rate', 'regime_volatility'], default='bootstrap')
+    simulate.add_argument('--dof', type=float, default=5.0, help="Degrees of freedom for the Student-t method")
+    simulate.add_argument('--simulations', type=positive_int, default=10000)
+    simulate.add_argument('--years', type=positive_int, default=75)
+    simulate.add_argument('--chunk-size', type=positive_int, default=1000)
+    simulate.add_argument('--seed', type=int, default=None)
+    simulate.add_argument('--output', default=data.simulated_paths_folder)
+    simulate.add_argument('--build-index', action='store_true', help="Also write the cumulative log-return index for each asset")
+    simulate.add_argument('--no-resume', dest='resume', action='store_false',
+                          help="Start again even if the output folder has a checkpoint from an interrupted run of the same configuration")
+    simulate.add_argument('--shard', type=int, default=None, help="Run only this shard (0-based) of --num-shards")
+    simulate.add_argument('--num-shards', type=positive_int, default=1, help="Split --simulations across this many shards")
+    simulate.add_argument('--launch-local', action='store_true', help="Run every shard as a local process and merge the results")
+    simulate.set_defaults(handler=run_simulate)
+
+    merge = commands.add_parser('merge', help="Combine the summaries of sharded simulation runs")
+    merge.add_argument('--store', default=data.simulated_paths_folder, help="Output folder of the sharded run")
+    merge.add_argument('--output', default=None, help="File for the merged summaries (default: summaries.npz in --store)")
+    merge.set_defaults(handler=run_merge)
+
+    frontier = commands.add_parser('frontier', help="Random portfolio efficient frontier")
+    frontier.add_argument('--portfolios', type=int, default=50000)
+    frontier.add_argument('--seed', type=int, default=None)
+    frontier.add_argument('--plot', action='store_true', help="Show the frontier plot")
+    frontier.add_argument('--plot-file', default=None, help="Render a headless density chart of the frontier to this file instead of showing it")
+    frontier.set_defaults(handler=run_frontier)
+
+    report = commands.add_parser('report', help="Sanity check statistics for historical and simulated returns")
+    report.add_argument('--historical', action='store_true', help="Statistics and rolling correlations of the GBP panel")
+    report.add_argument('--windows', type=int, nargs='+', default=[12, 24, 36, 60], help="Rolling window lengths in months")
+    report.add_argument('--store', default=None, help="Simulation store folder to summarise")
+    report.add_argument('--window-years', type=int, nargs='+', default=[10], help="Rolling windows for worst-return statistics")
+    report.add_argument('--memory-mb', type=float, default=256.0, help="Memory ceiling for the blocks of simulations read from the store")
+    report.add_argument('--no-historical-comparison', dest='compare_historical', action='store_false',
+                        help="Skip comparing simulated moments and correlations with the GBP panel")
+    report.add_argument('--frontier-chart', default=None, help="Render a density-binned frontier chart to this file")
+    report.add_argument('--portfolios', type=int, default=1000000, help="Random portfolios for the frontier chart")
+    report.add_argument('--seed', type=int, default=None)
+    report.add_argument('--fan-chart', default=None, help="Render a wealth fan chart for --weights over the store to this file")
+    report.add_argument('--weights', nargs='+', default=[], help="Portfolio weights as ASSET=WEIGHT pairs")
+    report.add_argument('--quantiles-file', default=None, help="Also save the fan chart percentiles to this CSV")
+    report.set_defaults(handler=run_report)
+
+    serve = commands.add_parser('serve', help="Local HTTP query service over a memory-mapped simulation store")
+    serve.add_argument('--store', default=data.simulated_paths_folder)
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--batch-window-ms', type=float, default=5.0, help="How long to wait to batch concurrent queries together")
+    serve.add_argument('--cache-mb', type=float, default=64.0, help="Memory budget for memoized results (0 turns the cache off)")
+    serve.add_argument('--cache-dir', default=None, help="Spill evicted results to this folder instead of dropping them")
+    serve.set_defaults(handler=run_serve)
+
+    optimize = commands.add_parser('optimize', help="CVaR / drawdown constrained model portfolio per risk band")
+    optimize.add_argument('--store', default=data.simulated_paths_folder)
+    optimize.add_argument('--confidence', type=float, default=0.95, help="CVaR confidence level")
+    optimize.add_argument('--horizon-months', type=int, default=12, help="Length of each return scenario")
+    optimize.add_argument('--scenarios', type=int, default=20000, help="Maximum number of scenarios (subsampled)")
+    optimize.add_argument('--drawdown-paths', type=int, default=100, help="Paths sampled for the drawdown constraints")
+    optimize.add_argument('--drawdown-months', type=int, default=60, help="Months of each sampled path used for drawdowns")
+    optimize.add_argument('--max-weight', type=float, default=1.0, help="Upper bound on any single asset weight")
+    optimize.add_argument('--seed', type=int, default=None)
+    optimize.add_argument('--output', default=None, help="Save the model portfolios to this CSV")
+    optimize.set_defaults(handler=run_optimize)
+
+    rebalance = commands.add_parser('rebalance', help="Compare rebalancing policies with transaction costs on the simulated store")
+    rebalance.add_argument('--store', default=data.simulated_paths_folder)
+    rebalance.add_argument('--model-portfolios', default=None, help="CSV of weights per risk level saved by the optimize command")
+    rebalance.add_argument('--weights', nargs='+', default=None, help="A single portfolio as ASSET=WEIGHT pairs")
+    rebalance.add_argument('--policies', nargs='+', default=['none', 'monthly', 'annual', 'band:0.05'],
+                           help="none, monthly, annual or band:<width>")
+    rebalance.add_argument('--cost', type=float, default=0.001, help="Proportional cost on the traded value")
+    rebalance.add_argument('--horizon-years', type=int, default=None)
+    rebalance.add_argument('--backend', choices=['numba', 'numpy'], default=None, help="Backend for the tolerance-band kernel")
+    rebalance.add_argument('--output', default=None, help="Save the comparison to this CSV")
+    rebalance.set_defaults(handler=run_rebalance)
+
+    backtest = commands.add_parser('backtest', help="Rolling-cohort backtest from every historical start month")
+    backtest.add_argument('--model-portfolios', default=None, help="CSV of weights per risk level saved by the optimize command")
+    backtest.add_argument('--weights', nargs='+', default=None, help="A single portfolio as ASSET=WEIGHT pairs")
+    backtest.add_argument('--withdrawal-rate', type=float, default=0.0, help="Annual withdrawal as a share of starting wealth")
+    backtest.add_argument('--horizon-years', type=int, nargs='+', default=[1, 3, 5, 10], help="Horizons shown in the summary")
+    backtest.add_argument('--output', default=None, help="Save the summary to this CSV")
+    backtest.add_argument('--cube-file', default=None, help="Save the full (start x horizon x portfolio) cube to this .npz")
+    backtest.set_defaults(handler=run_backtest)
+
+    glidepath = commands.add_parser('glidepath', help="Compare de-risking glide paths across the risk levels on the simulated store")
+    glidepath.add_argument('--store', default=data.simulated_paths_folder)
+    glidepath.add_argument('--model-portfolios', default=None,
+                           help="CSV of weights per risk level saved by optimize (default: random portfolios at the target volatilities)")
+    glidepath.add_argument('--portfolios', type=int, default=100000, help="Random portfolios searched when there is no --model-portfolios")
+    glidepath.add_argument('--seed', type=int, default=None)
+    glidepath.add_argument('--start-levels', type=int, nargs='+', default=[6, 7, 8, 9, 10])
+    glidepath.add_argument('--end-levels', type=int, nargs='+', default=[1, 2, 3, 4, 5])
+    glidepath.add_argument('--glide-years', type=int, nargs='+', default=[10, 20, 30])
+    glidepath.add_argument('--derisk-start-years', type=int, default=0, help="Years at the start level before de-risking begins")
+    glidepath.add_argument('--shapes', nargs='+', choices=['step', 'linear'], default=['step', 'linear'])
+    glidepath.add_argument('--years', type=int, default=None, help="Horizon (default: the whole store)")
+    glidepath.add_argument('--withdrawal-rate', type=float, default=0.0, help="Annual withdrawal as a share of starting wealth")
+    glidepath.add_argument('--top', type=int, default=20, help="Number of glide paths to print")
+    glidepath.add_argument('--output', default=None, help="Save every glide path's outcomes to this CSV")
+    glidepath.set_defaults(handler=run_glidepath)
+
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    # Bad inputs (unknown assets or policies, missing stores or files) end the command with their message, not a traceback
+    try:
+        args.handler(args)
+    except (ValueError, FileNotFoundError) as e:
+        raise SystemExit(f"Error: {e}")
@@ -0,0 +1,86 @@
+# Folder layout and asset lists shared by every step of the pipeline.
+# Paths are relative to the repository root, which is where the commands are run from.
+
+monthly_returns_folder = 'monthly_returns/'
+gbp_returns_folder = 'gbp_monthly_returns/'
+boe_rates_file = 'interest_rates/BOE_rates_original.csv'
+moneymarket_returns_file = gbp_returns_folder + 'Moneymarket_monthly_returns_GBP.csv'
+simulated_paths_folder = 'simulated_paths'
+
+# AGG will require currency conversion EEM data looks strange. Remember I converting to monthly adjusted closing anyway
+ticker_symbol_list = ['AGG', 'LQD', 'HYG', 'IWDA.L', 'EEM', 'VNQI', 'DBC', 'GLD', 'IUKP.L', 'IGF']
+GBP_to_USD = 'GBPUSD=X'
+
+# All of these except IUKP.L are USD-denominated
+asset_tickers_to_convert = ['AGG', 'LQD', 'HYG', 'IWDA.L', 'EEM', 'VNQI', 'DBC', 'GLD', 'IGF']
+
+all_asset_classes = [
+    'Moneymarket_monthly_returns_GBP.csv',
+    'AGG_monthly_returns_GBP.csv',
+    'LQD_monthly_returns_GBP.csv',
+    'HYG_monthly_returns_GBP.csv',
+    'IWDA.L_monthly_returns_GBP.csv',
+    'EEM_monthly_returns_GBP.csv',
+    'VNQI_monthly_returns_GBP.csv',
+    'DBC_monthly_returns_GBP.csv',
+    'GLD_monthly_returns_GBP.csv',
+    'IGF_monthly_returns_GBP.csv',
+    'IUKP.L_monthly_returns.csv', # This one is already in GBP
+]
+
+# The correlation sanity check leaves out the money market series
+risky_asset_classes = all_asset_classes[1:]
+
+num_months_in_year = 12
+
+def ticker_from_filename(filename: str) -> str:
+    return filename.replace('_monthly_returns_GBP.csv', '').replace('_monthly_returns.csv', '')
+
+def create_combined_returns_df(file_list: list = None, folder: str = gbp_returns_folder):
+    # pandas is imported here so that commands which only need the paths above start quickly
+    import pandas as pd
+
+    if file_list is None:
+        file_list = all_asset_classes
+    all_returns = {}
+    for filename in file_list:
+        file_path = folder + filename
+        try:
+            ticker_name = ticker_from_filename(filename)
+            df = pd.read_csv(file_path, index_col='Date', parse_dates=True)
+            if 'Monthly_Return' in df.columns:
+                all_returns[ticker_name] = df['Monthly_Return']
+            else:
+                print(f"Warning: No recognised return column in {file_path}. Skipping.")
+        except FileNotFoundError:
+            print(f"Error: File not found for {file_path}. Skipping.")
+        except Exception as e:
+            print(f"Error processing {file_path}: {e}")
+
+    # Combine all series into a single DataFrame
+    combined_df = pd.DataFrame(all_returns)
+
+    initial_rows = len(combined_df)
+    combined_df.dropna(inplace=True)
+    final_rows = len(combined_df)
+
+    if initial_rows != final_rows:
+        print(f"Warning: Dropped {initial_rows - final_rows} rows due to missing data for some assets.")
+        print(f"Common data period: {combined_df.index.min().strftime('%Y-%m')} to {combined_df.index.max().strftime('%Y-%m')}")
+
+    return combined_df
+
+def load_gbp_returns(file_list: list = None, folder: str = gbp_returns_folder):
+    """
+    Loads the combined GBP monthly returns panel and prints its coverage, or exits if nothing loaded.
+    """
+    print("--- Consolidating Monthly Returns Data ---")
+    combined_monthly_returns_gbp = create_combined_returns_df(file_list, folder)
+
+    if combined_monthly_returns_gbp.empty:
+        print("No data to proceed. Please check your CSV files and paths.")
+        raise SystemExit(1)
+
+    print(f"\nCombined DataFrame shape: {combined_monthly_returns_gbp.shape}")
+    print(f"Data covers: {combined_monthly_returns_gbp.index.min().strftime('%Y-%m')} to {combined_monthly_returns_gbp.index.max().strftime('%Y-%m')}")
+    return combined_monthly_returns_gbp
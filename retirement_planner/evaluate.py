@@ -0,0 +1,155 @@
+import numpy as np
+from retirement_planner.data import num_months_in_year
+
+# Vectorized evaluation of many fixed-weight portfolios against the simulation store.
+# Portfolios are rebalanced monthly to their weights. Wealth starts at 1 and a fixed monthly withdrawal
+# of withdrawal_rate / 12 (a share of the initial wealth) is taken at the start of each month.
+#
+# With G_t the growth of 1 unit up to month t, wealth after t months is
+#     W_t = G_t * (1 - w * sum_{k<t} 1 / G_k)
+# so whole wealth paths, depletion and success come from cumulative sums rather than a loop over months.
+
+default_percentiles = (5, 25, 50, 75, 95)
+default_memory_budget = 256 * 1024**2
+
+def weights_matrix(portfolios, asset_names: list):
+    """
+    Converts portfolios given as dicts (asset name -> weight) or sequences in store order into a
+    (portfolios x assets) array. Weights must be non-negative and sum to 1.
+    """
+    if isinstance(portfolios, dict) or (len(portfolios) and np.isscalar(portfolios[0])):
+        portfolios = [portfolios]
+    rows = []
+    for portfolio in portfolios:
+        if isinstance(portfolio, dict):
+            unknown = set(portfolio) - set(asset_names)
+            if unknown:
+                raise ValueError(f"Unknown assets in portfolio: {sorted(unknown)}")
+            rows.append([float(portfolio.get(asset_name, 0.0)) for asset_name in asset_names])
+        else:
+            if len(portfolio) != len(asset_names):
+                raise ValueError(f"Expected {len(asset_names)} weights in the order {asset_names}, got {len(portfolio)}")
+            rows.append([float(weight) for weight in portfolio])
+    weights = np.array(rows, dtype=np.float64)
+    if (weights < 0).any():
+        raise ValueError("Portfolio weights must be non-negative (long-only).")
+    if not np.allclose(weights.sum(axis=1), 1.0, atol=1e-6):
+        raise ValueError("Portfolio weights must sum to 1.")
+    return weights
+
+def chunk_size_for_budget(num_months: int, num_portfolios: int, num_assets: int, memory_budget: int = default_memory_budget) -> int:
+    # One (chunk x months x assets) block of store data plus about four (chunk x months x portfolios) float64 temporaries
+    return max(1, int(memory_budget // (8 * num_months * (num_assets + 4 * num_portfolios))))
+
+def asset_returns_chunk(simulated_asset_paths: dict, asset_names: list, start: int, stop: int, num_months: int):
+    """
+    Gathers simulations [start, stop) of every asset into one (chunk x months x assets) array.
+    """
+    block = np.empty((stop - start, num_months, len(asset_names)))
+    for asset_idx, asset_name in enumerate(asset_names):
+        block[:, :, asset_idx] = simulated_asset_paths[asset_name][start:stop, :num_months]
+    return block
+
+def portfolio_returns_chunk(simulated_asset_paths: dict, asset_names: list, weights, start: int, stop: int, num_months: int):
+    """
+    Monthly returns of every portfolio for simulations [start, stop): (chunk x months x portfolios),
+    computed as a single matrix product of the asset block with the (assets x portfolios) weights.
+    """
+    return asset_returns_chunk(simulated_asset_paths, asset_names, start, stop, num_months) @ weights.T
+
+def schedule_returns_chunk(simulated_asset_paths: dict, asset_names: list, schedules, start: int, stop: int):
+    """
+    Monthly returns of every weight schedule for simulations [start, stop): (chunk x months x schedules).
+    schedules is (schedules x months x assets); month m of every path uses row m of each schedule, so this is
+    the einsum 'sma,gma->smg', done as one batched matmul over months.
+    """
+    num_months = schedules.shape[1]
+    block = asset_returns_chunk(simulated_asset_paths, asset_names, start, stop, num_months)
+    return np.matmul(block.transpose(1, 0, 2), schedules.transpose(1, 2, 0)).transpose(1, 0, 2)
+
+def wealth_statistics(portfolio_returns, withdrawal_rate: float = 0.0):
+    """
+    Per-path outcomes for a (paths x months x portfolios) block of monthly returns:
+    terminal wealth, whether wealth lasted the whole horizon and the maximum drawdown of the investments.
+    """
+    growth = np.cumprod(1 + portfolio_returns, axis=1)
+    # The starting wealth of 1 counts as the first peak
+    peak = np.maximum(np.maximum.accumulate(growth, axis=1), 1.0)
+    max_drawdown = (growth / peak - 1).min(axis=1)
+
+    if withdrawal_rate <= 0:
+        return growth[:, -1], np.ones(growth[:, -1].shape, dtype=bool), max_drawdown
+
+    monthly_withdrawal = withdrawal_rate / num_months_in_year
+    # sum_{k<T} 1 / G_k with G_0 = 1
+    # A -100% month makes G_k zero, which correctly sends the sum to infinity and the path to failure
+    with np.errstate(divide='ignore'):
+        discounted_withdrawals = 1 + np.sum(1 / growth[:, :-1], axis=1)
+    remaining_share = 1 - monthly_withdrawal * discounted_withdrawals
+    success = remaining_share > 0
+    terminal_wealth = growth[:, -1] * np.maximum(remaining_share, 0.0)
+    return terminal_wealth, success, max_drawdown
+
+def summarise_outcomes(num_simulations: int, num_portfolios: int, chunk_size: int, returns_for_chunk,
+                       withdrawal_rate: float = 0.0, percentiles=default_percentiles):
+    """
+    Runs wealth_statistics over every chunk of simulations given by returns_for_chunk(start, stop)
+    and reduces the per-path outcomes to per-portfolio statistics.
+    """
+    terminal_wealth = np.empty((num_simulations, num_portfolios))
+    success = np.empty((num_simulations, num_portfolios), dtype=bool)
+    max_drawdown = np.empty((num_simulations, num_portfolios))
+    for start in range(0, num_simulations, chunk_size):
+        stop = min(start + chunk_size, num_simulations)
+        terminal_wealth[start:stop], success[start:stop], max_drawdown[start:stop] = wealth_statistics(returns_for_chunk(start, stop), withdrawal_rate)
+
+    percentiles = list(percentiles)
+    return {
+        'percentiles': percentiles,
+        'terminal_wealth_percentiles': np.percentile(terminal_wealth, percentiles, axis=0).T,
+        'success_probability': success.mean(axis=0),
+        'max_drawdown_percentiles': np.percentile(max_drawdown, percentiles, axis=0).T,
+        'median_max_drawdown': np.median(max_drawdown, axis=0),
+        'worst_max_drawdown': max_drawdown.min(axis=0),
+    }
+
+def evaluate_portfolios(simulated_asset_paths: dict, asset_names: list, weights, horizon_months: int = None,
+                        withdrawal_rate: float = 0.0, percentiles=default_percentiles, memory_budget: int = default_memory_budget):
+    """
+    Evaluates a (portfolios x assets) weight matrix over every simulated path in one batched pass.
+    Returns a dict with per-portfolio terminal wealth percentiles, success probability and drawdown statistics.
+    """
+    num_simulations, store_months = simulated_asset_paths[asset_names[0]].shape
+    horizon_months = store_months if horizon_months is None else int(horizon_months)
+    if not 0 < horizon_months <= store_months:
+        raise ValueError(f"Horizon must be between 1 and {store_months} months, got {horizon_months}")
+
+    weights = np.asarray(weights, dtype=np.float64)
+    chunk_size = chunk_size_for_budget(horizon_months, weights.shape[0], len(asset_names), memory_budget)
+    return summarise_outcomes(num_simulations, weights.shape[0], chunk_size,
+                              lambda start, stop: portfolio_returns_chunk(simulated_asset_paths, asset_names, weights, start, stop, horizon_months),
+                              withdrawal_rate, percentiles)
+
+def evaluate_schedules(simulated_asset_paths: dict, asset_names: list, schedules, withdrawal_rate: float = 0.0,
+                       percentiles=default_percentiles, memory_budget: int = default_memory_budget):
+    """
+    Evaluates time-varying weights: one (months x assets) schedule or a (schedules x months x assets) stack,
+    rebalanced monthly to that month's row. The schedule length is the horizon. Returns the same dict as
+    evaluate_portfolios with one row per schedule.
+    """
+    schedules = np.asarray(schedules, dtype=np.float64)
+    if schedules.ndim == 2:
+        schedules = schedules[None]
+    num_simulations, store_months = simulated_asset_paths[asset_names[0]].shape
+    num_schedules, horizon_months, num_assets = schedules.shape
+    if num_assets != len(asset_names):
+        raise ValueError(f"Schedules have {num_assets} assets, expected {len(asset_names)} in the order {asset_names}")
+    if not 0 < horizon_months <= store_months:
+        raise ValueError(f"Schedules must cover between 1 and {store_months} months, got {horizon_months}")
+    if (schedules < 0).any() or not np.allclose(schedules.sum(axis=2), 1.0, atol=1e-6):
+        raise ValueError("Every month of every schedule must have non-negative weights that sum to 1.")
+
+    chunk_size = chunk_size_for_budget(horizon_months, num_schedules, num_assets, memory_budget)
+    return summarise_outcomes(num_simulations, num_schedules, chunk_size,
+                              lambda start, stop: schedule_returns_chunk(simulated_asset_paths, asset_names, schedules, start, stop),
+                              withdrawal_rate, percentiles)
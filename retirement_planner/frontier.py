@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+from retirement_planner.simulate import annualized_inputs
+
+# Mean-variance analysis: random long-only portfolios, an approximate efficient frontier and the risk bands
+# that map portfolio volatility (and later drawdown) onto risk levels 1 - 10.
+
+risk_band_definitions = {
+    # Risk Level: {'vol_min': X, 'vol_max': Y, 'dd_max': Z}
+    # Volatility is from the plot. dd_max you will verify after running the next code.
+    1: {'vol_min': 0.090, 'vol_max': 0.100, 'dd_max': -0.075}, # ~9.0% to 10.0% Vol, Max 7.5% DD
+    2: {'vol_min': 0.100, 'vol_max': 0.110, 'dd_max': -0.100}, # ~10.0% to 11.0% Vol, Max 10% DD
+    3: {'vol_min': 0.110, 'vol_max': 0.120, 'dd_max': -0.125}, # ~11.0% to 12.0% Vol, Max 12.5% DD
+    4: {'vol_min': 0.120, 'vol_max': 0.130, 'dd_max': -0.150}, # ~12.0% to 13.0% Vol, Max 15% DD
+    5: {'vol_min': 0.130, 'vol_max': 0.140, 'dd_max': -0.175}, # ~13.0% to 14.0% Vol, Max 17.5% DD
+    6: {'vol_min': 0.140, 'vol_max': 0.150, 'dd_max': -0.200}, # ~14.0% to 15.0% Vol, Max 20% DD
+    7: {'vol_min': 0.150, 'vol_max': 0.160, 'dd_max': -0.250}, # ~15.0% to 16.0% Vol, Max 25% DD
+    8: {'vol_min': 0.160, 'vol_max': 0.170, 'dd_max': -0.300}, # ~16.0% to 17.0% Vol, Max 30% DD
+    9: {'vol_min': 0.170, 'vol_max': 0.180, 'dd_max': -0.350}, # ~17.0% to 18.0% Vol, Max 35% DD
+    10: {'vol_min': 0.180, 'vol_max': 1.0, 'dd_max': -1.0}    # >18.0% Vol, more than 35% DD
+}
+
+# Your `target_volatilities_for_risk_levels` would also align with these:
+target_volatilities_for_risk_levels = {
+    1: 0.095,  # ~9.5%
+    2: 0.105,  # ~10.5%
+    3: 0.115,  # ~11.5%
+    4: 0.125,  # ~12.5%
+    5: 0.135,  # ~13.5%
+    6: 0.145,  # ~14.5%
+    7: 0.155,  # ~15.5%
+    8: 0.165,  # ~16.5%
+    9: 0.175,  # ~17.5%
+    10: 0.185   # ~18.5%
+}
+
+def random_portfolio_weights(rng, num_portfolios: int, num_assets: int):
+    weights = rng.random((num_portfolios, num_assets))
+    weights /= weights.sum(axis=1, keepdims=True) # Normalize weights to sum to 1
+    return weights
+
+def generate_random_portfolios(expected_returns_annualized, covariance_matrix_annualized, num_portfolios: int = 50000, seed=None):
+    """
+    Generates random long-only portfolios and their annualized return, volatility and Sharpe Ratio
+    (assuming 0 risk-free rate for simplicity). All portfolios are evaluated in one matrix product.
+    """
+    asset_names = list(expected_returns_annualized.index)
+    weights = random_portfolio_weights(np.random.default_rng(seed), num_portfolios, len(asset_names))
+
+    p_returns = weights @ expected_returns_annualized.values
+    p_volatilities = np.sqrt(np.einsum('pi,ij,pj->p', weights, covariance_matrix_annualized.values, weights))
+
+    columns = ['Volatility', 'Return', 'Sharpe_Ratio'] + asset_names
+    return pd.DataFrame(data=np.c_[p_volatilities, p_returns, p_returns / p_volatilities, weights], columns=columns)
+
+def approximate_efficient_frontier(portfolios_df, num_bins: int = 100):
+    """
+    For each small volatility bin, keep the portfolio with the highest return.
+    This is a brute-force approximation; proper MVO involves optimization, but this gives a good visual.
+    """
+    volatility_bins = np.linspace(portfolios_df['Volatility'].min(), portfolios_df['Volatility'].max(), num_bins)
+    bin_ids = np.digitize(portfolios_df['Volatility'], volatility_bins)
+    # The maximum volatility sits on the last edge, which the original loop (right-open bins) never included
+    in_range = bin_ids < num_bins
+    best_in_bin = portfolios_df[in_range].groupby(bin_ids[in_range])['Return'].idxmax()
+
+    efficient_frontier = portfolios_df.loc[best_in_bin.values]
+    efficient_frontier = efficient_frontier.drop_duplicates(subset=['Volatility']).sort_values(by='Volatility')
+    return efficient_frontier.reset_index(drop=True)
+
+def plot_efficient_frontier(portfolios_df, efficient_frontier, output_file: str = None):
+    """
+    Scatter plot of the random portfolios coloured by Sharpe Ratio with the frontier in red.
+    Saves to output_file when given, otherwise opens a window.
+    """
+    # matplotlib is only needed for plotting, so keep it out of the import path of the other commands
+    import matplotlib
+    if output_file is not None:
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(10, 6))
+    plt.scatter(portfolios_df['Volatility'], portfolios_df['Return'], c=portfolios_df['Sharpe_Ratio'], cmap='viridis', s=10, alpha=0.5)
+    plt.colorbar(label='Sharpe Ratio (Annualized)')
+    plt.scatter(efficient_frontier['Volatility'], efficient_frontier['Return'], color='red', marker='o', s=50, label='Efficient Frontier')
+    plt.title('Portfolio Optimization - Efficient Frontier (Annualized)')
+    plt.xlabel('Annualized Volatility (Standard Deviation)')
+    plt.ylabel('Annualized Return')
+    plt.grid(True)
+    plt.legend()
+    if output_file is not None:
+        plt.savefig(output_file, dpi=150)
+        plt.close()
+        print(f"Saved efficient frontier plot to {output_file}")
+    else:
+        plt.show()
+
+def run_frontier(monthly_returns_df, num_portfolios: int = 50000, seed=None):
+    expected_returns_annualized, covariance_matrix_annualized = annualized_inputs(monthly_returns_df)
+    print("\nAnnualized Expected Returns (from historical monthly means):")
+    print(expected_returns_annualized)
+    print("\nAnnualized Covariance Matrix:")
+    print(covariance_matrix_annualized)
+
+    std_devs_annualized = pd.Series(np.sqrt(np.diag(covariance_matrix_annualized)), index=monthly_returns_df.columns)
+    print("\nAnnualized Standard Deviations (Volatility):")
+    print(std_devs_annualized)
+
+    print(f"\n--- Generating {num_portfolios} Random Portfolios for MVO ---")
+    portfolios_df = generate_random_portfolios(expected_returns_annualized, covariance_matrix_annualized, num_portfolios, seed)
+    print("Sample of generated portfolios:")
+    print(portfolios_df.head())
+
+    efficient_frontier = approximate_efficient_frontier(portfolios_df)
+    print("\nApproximate Efficient Frontier:")
+    print(efficient_frontier)
+    return portfolios_df, efficient_frontier
@@ -0,0 +1,95 @@
+import itertools
+import numpy as np
+import pandas as pd
+from retirement_planner.data import num_months_in_year
+from retirement_planner.evaluate import default_memory_budget, default_percentiles, evaluate_schedules
+from retirement_planner.frontier import generate_random_portfolios, target_volatilities_for_risk_levels
+
+# Glide paths: (months x assets) weight schedules that move down the risk levels over time.
+# Each risk level has one portfolio, either a model portfolio from the optimize command or the best random
+# portfolio at the level's target volatility. Between derisk_start and derisk_start + glide months a path either
+# steps through every level from the start level to the end level (equal time in each) or moves linearly
+# from the start portfolio to the end portfolio. It holds the start portfolio before that and the end portfolio after.
+# Candidate schedules are stacked into one (schedules x months x assets) array and evaluated in one batched run.
+
+glide_path_shapes = ['step', 'linear']
+
+def target_volatility_portfolios(expected_returns_annualized, covariance_matrix_annualized, targets: dict = target_volatilities_for_risk_levels,
+                                 num_portfolios: int = 100000, tolerance: float = 0.005, seed=None):
+    """
+    For each risk level, the highest-return random portfolio within `tolerance` of its target volatility
+    (or the closest one if none is that close). Returns a DataFrame indexed by Risk_Level with one column per asset.
+    """
+    portfolios_df = generate_random_portfolios(expected_returns_annualized, covariance_matrix_annualized, num_portfolios, seed)
+    asset_names = list(expected_returns_annualized.index)
+    rows = {}
+    for risk_level, target in targets.items():
+        distance = (portfolios_df['Volatility'] - target).abs()
+        candidates = portfolios_df[distance <= tolerance]
+        best = candidates['Return'].idxmax() if len(candidates) else distance.idxmin()
+        rows[risk_level] = portfolios_df.loc[best, asset_names]
+    return pd.DataFrame.from_dict(rows, orient='index').rename_axis('Risk_Level')
+
+def glide_fraction(num_months: int, derisk_start_month: int, glide_months: int):
+    """
+    Share of the glide completed in each month: 0 before derisk_start_month, 1 from derisk_start_month + glide_months.
+    """
+    months = np.arange(num_months)
+    return np.clip((months - derisk_start_month) / max(glide_months, 1), 0.0, 1.0)
+
+def step_glide_path(level_weights: dict, start_level: int, end_level: int, num_months: int, derisk_start_month: int = 0, glide_months: int = None):
+    """
+    (months x assets) schedule holding each risk level from start_level down to end_level for an equal share of the glide.
+    """
+    glide_months = num_months - derisk_start_month if glide_months is None else glide_months
+    levels = np.arange(start_level, end_level - 1, -1) if end_level <= start_level else np.arange(start_level, end_level + 1)
+    fraction = glide_fraction(num_months, derisk_start_month, glide_months)
+    level_positions = np.minimum((fraction * len(levels)).astype(np.int64), len(levels) - 1)
+    return np.stack([np.asarray(level_weights[level], dtype=np.float64) for level in levels])[level_positions]
+
+def linear_glide_path(start_weights, end_weights, num_months: int, derisk_start_month: int = 0, glide_months: int = None):
+    """
+    (months x assets) schedule moving linearly from start_weights to end_weights over the glide.
+    """
+    glide_months = num_months - derisk_start_month if glide_months is None else glide_months
+    fraction = glide_fraction(num_months, derisk_start_month, glide_months)[:, None]
+    return (1 - fraction) * np.asarray(start_weights, dtype=np.float64) + fraction * np.asarray(end_weights, dtype=np.float64)
+
+def candidate_glide_paths(level_weights: dict, num_months: int, start_levels, end_levels, glide_years=(10, 20, 30),
+                          derisk_start_years: int = 0, shapes=glide_path_shapes):
+    """
+    Every (shape, start level, end level, glide length) combination with end level <= start level.
+    Returns (DataFrame describing each schedule, (schedules x months x assets) array).
+    """
+    descriptions = []
+    schedules = []
+    derisk_start_month = derisk_start_years * num_months_in_year
+    for shape, start_level, end_level, years in itertools.product(shapes, start_levels, end_levels, glide_years):
+        if end_level > start_level:
+            continue
+        glide_months = years * num_months_in_year
+        if shape == 'step':
+            schedule = step_glide_path(level_weights, start_level, end_level, num_months, derisk_start_month, glide_months)
+        elif shape == 'linear':
+            schedule = linear_glide_path(level_weights[start_level], level_weights[end_level], num_months, derisk_start_month, glide_months)
+        else:
+            raise ValueError(f"Unknown glide path shape '{shape}'. Use one of {glide_path_shapes}.")
+        descriptions.append({'Shape': shape, 'Start_Level': start_level, 'End_Level': end_level, 'Glide_Years': years})
+        schedules.append(schedule)
+    if not schedules:
+        raise ValueError("No glide paths to build: every end level is above its start level.")
+    return pd.DataFrame(descriptions), np.stack(schedules)
+
+def compare_glide_paths(simulated_asset_paths: dict, asset_names: list, descriptions, schedules, withdrawal_rate: float = 0.0,
+                        percentiles=default_percentiles, memory_budget: int = default_memory_budget):
+    """
+    Evaluates every schedule in one batched run and adds its outcomes to the descriptions.
+    """
+    results = evaluate_schedules(simulated_asset_paths, asset_names, schedules, withdrawal_rate, percentiles, memory_budget)
+    outcomes = descriptions.copy()
+    for i, percentile in enumerate(results['percentiles']):
+        outcomes[f"Wealth_P{percentile:g}"] = results['terminal_wealth_percentiles'][:, i]
+    outcomes['Success_Probability'] = results['success_probability']
+    outcomes['Median_Max_Drawdown'] = results['median_max_drawdown']
+    outcomes['Worst_Max_Drawdown'] = results['worst_max_drawdown']
+    return outcomes
@@ -0,0 +1,52 @@
+from retirement_planner.data import monthly_returns_folder
+
+def process_ticker_to_monthly_returns(ticker_symbol: str, start_date: str, end_date: str, output_folder: str = monthly_returns_folder):
+    """
+    Downloads historical data for a ticker, converts it to monthly adjusted returns,
+    and saves the results to a CSV.
+    """
+    # yfinance is slow to import and only needed here
+    import yfinance as yf
+
+    try:
+        # Download historical data. By default, yfinance adjusts Open, High, Low, Close.
+        # The 'Close' column will contain the adjusted prices.
+        etf_data = yf.download(ticker_symbol, start=start_date, end=end_date)
+
+        # Handle cases where 'Adj Close' might not exist (common with auto_adjust=True)
+        # Use 'Close' column as it's typically already adjusted by yfinance's default behavior
+        if 'Adj Close' in etf_data.columns:
+            prices_to_use = etf_data['Adj Close']
+            print(f"Using 'Adj Close' for {ticker_symbol}")
+        elif 'Close' in etf_data.columns:
+            prices_to_use = etf_data['Close']
+            print(f"Using 'Close' (which is typically adjusted) for {ticker_symbol}")
+        else:
+            print(f"Error: Neither 'Adj Close' nor 'Close' found for {ticker_symbol}. Skipping.")
+            return
+
+        # Resample to Monthly (End of Month)
+        monthly_prices = prices_to_use.resample('M').last()
+
+        # Calculate Monthly Returns and drop the first NaN value
+        monthly_returns = monthly_prices.pct_change().dropna()
+        monthly_returns = monthly_returns.rename(columns={monthly_returns.columns[0]: 'Monthly_Return'})
+
+        print(f"\nMonthly Returns for {ticker_symbol} (Head):\n{monthly_returns.head()}")
+        print(f"\nMonthly Returns for {ticker_symbol} (Tail):\n{monthly_returns.tail()}")
+
+        # Save the monthly returns to a new CSV file, replacing '^' with '_' for valid filenames
+        monthly_file_name = f"{output_folder}{ticker_symbol}_monthly_returns.csv".replace("^", "_")
+
+        monthly_returns.name = 'Monthly_Return'
+        monthly_returns.to_csv(monthly_file_name)
+        print(f"\nMonthly returns for {ticker_symbol} saved to {monthly_file_name}")
+
+    except Exception as e:
+        print(f"Error processing data for {ticker_symbol}: {e}")
+
+def ingest_all(ticker_symbols: list, start_date: str, end_date: str, output_folder: str = monthly_returns_folder):
+    print(f"--- Starting data download and monthly return conversion from {start_date} to {end_date} ---")
+    for ticker in ticker_symbols:
+        process_ticker_to_monthly_returns(ticker, start_date, end_date, output_folder)
+    print("\n--- All monthly return CSVs created ---")
@@ -0,0 +1,308 @@
+import os
+import numpy as np
+from retirement_planner.data import num_months_in_year
+
+# Path-dependent calculations that have to walk each simulated path month by month:
+#  - threshold_rebalance: tolerance-band rebalancing with proportional transaction costs
+#  - guardrail_withdrawals: withdrawals cut / raised when the withdrawal rate leaves a guardrail band
+#  - drawdown_recovery: maximum drawdown, longest time underwater and time to recover from the maximum drawdown
+# threshold_rebalance backs the rebalance command's band policies. guardrail_withdrawals and drawdown_recovery
+# are library-only for now: no command calls them.
+#
+# Two backends give identical results:
+#  - 'numba': compiled loops, parallel over simulations (used when numba is installed)
+#  - 'numpy': vectorized across simulations with a loop over months
+# Both use only +, -, *, / and comparisons in the same order (asset sums run left to right), so the
+# floating point results match bit for bit. The backend is chosen at runtime: pass backend=..., call
+# set_backend(), or set RETIREMENT_PLANNER_BACKEND to 'numba', 'numpy' or 'auto' (the default).
+
+backend_env_var = 'RETIREMENT_PLANNER_BACKEND'
+backends = ['numba', 'numpy']
+
+_selected_backend = None
+_numba_kernels = None
+
+def numba_available() -> bool:
+    try:
+        import numba
+    except ImportError:
+        return False
+    return True
+
+def resolve_backend(name: str = 'auto') -> str:
+    if name == 'auto':
+        return 'numba' if numba_available() else 'numpy'
+    if name not in backends:
+        raise ValueError(f"Unknown kernel backend '{name}'. Choose from {backends} or 'auto'.")
+    if name == 'numba' and not numba_available():
+        raise ValueError("The numba backend was requested but numba is not installed.")
+    return name
+
+def set_backend(name: str = 'auto') -> str:
+    global _selected_backend
+    _selected_backend = resolve_backend(name)
+    return _selected_backend
+
+def get_backend() -> str:
+    if _selected_backend is None:
+        set_backend(os.environ.get(backend_env_var, 'auto'))
+    return _selected_backend
+
+def _resolve(backend: str = None) -> str:
+    return get_backend() if backend is None else resolve_backend(backend)
+
+# --- NumPy backend ---
+
+def _sequential_sum(values):
+    """
+    Sums the last axis left to right, matching the order of the compiled loops.
+    """
+    total = values[..., 0].copy()
+    for i in range(1, values.shape[-1]):
+        total += values[..., i]
+    return total
+
+def _threshold_rebalance_numpy(asset_returns, target_weights, band, cost_rate):
+    num_simulations, num_months, _ = asset_returns.shape
+    num_portfolios = target_weights.shape[0]
+    weights = np.broadcast_to(target_weights, (num_simulations,) + target_weights.shape).copy()
+    growth = np.ones((num_simulations, num_portfolios))
+    cost_factor = np.ones((num_simulations, num_portfolios))
+    turnover = np.zeros((num_simulations, num_portfolios))
+    rebalances = np.zeros((num_simulations, num_portfolios), dtype=np.int64)
+
+    for month in range(num_months):
+        grown = weights * (1.0 + asset_returns[:, month, None, :])
+        gross = _sequential_sum(grown)
+        weights = grown / gross[:, :, None]
+        growth *= gross
+
+        if month == num_months - 1:
+            break
+        deviation = np.abs(weights - target_weights)
+        trigger = deviation.max(axis=2) > band
+        if trigger.any():
+            traded = _sequential_sum(deviation)
+            cost_factor = np.where(trigger, cost_factor * (1.0 - cost_rate * traded), cost_factor)
+            turnover = np.where(trigger, turnover + traded / 2.0, turnover)
+            rebalances += trigger
+            weights = np.where(trigger[:, :, None], target_weights, weights)
+    return growth, cost_factor, turnover, rebalances
+
+def _guardrail_withdrawals_numpy(portfolio_returns, initial_rate, upper, lower, adjustment):
+    num_simulations, num_months = portfolio_returns.shape
+    wealth = np.ones(num_simulations)
+    annual_withdrawal = np.full(num_simulations, initial_rate)
+    total_withdrawn = np.zeros(num_simulations)
+    min_annual_withdrawal = annual_withdrawal.copy()
+    depleted_month = np.full(num_simulations, -1, dtype=np.int64)
+
+    for month in range(num_months):
+        if month > 0 and month % num_months_in_year == 0:
+            alive = wealth > 0.0
+            current_rate = np.where(alive, annual_withdrawal / np.where(alive, wealth, 1.0), 0.0)
+            cut = alive & (current_rate > initial_rate * upper)
+            raise_ = alive & ~cut & (current_rate < initial_rate * lower)
+            annual_withdrawal = np.where(cut, annual_withdrawal * (1.0 - adjustment),
+                                         np.where(raise_, annual_withdrawal * (1.0 + adjustment), annual_withdrawal))
+            min_annual_withdrawal = np.where(alive, np.minimum(min_annual_withdrawal, annual_withdrawal), min_annual_withdrawal)
+
+        taken = np.minimum(annual_withdrawal / num_months_in_year, wealth)
+        total_withdrawn += taken
+        wealth = (wealth - taken) * (1.0 + portfolio_returns[:, month])
+        newly_depleted = (wealth <= 0.0) & (depleted_month < 0)
+        depleted_month[newly_depleted] = month
+        wealth = np.maximum(wealth, 0.0)
+    return wealth, total_withdrawn, min_annual_withdrawal, depleted_month
+
+def _drawdown_recovery_numpy(portfolio_returns):
+    num_simulations, num_months = portfolio_returns.shape
+    wealth = np.ones(num_simulations)
+    peak = np.ones(num_simulations)
+    peak_month = np.zeros(num_simulations, dtype=np.int64)
+    max_drawdown = np.zeros(num_simulations)
+    max_drawdown_peak_month = np.zeros(num_simulations, dtype=np.int64)
+    recovery_months = np.full(num_simulations, -1, dtype=np.int64)
+    pending = np.zeros(num_simulations, dtype=bool)
+    underwater = np.zeros(num_simulations, dtype=np.int64)
+    max_underwater = np.zeros(num_simulations, dtype=np.int64)
+
+    for month in range(num_months):
+        wealth = wealth * (1.0 + portfolio_returns[:, month])
+        new_peak = wealth >= peak
+        recovered = new_peak & pending
+        recovery_months = np.where(recovered, month + 1 - max_drawdown_peak_month, recovery_months)
+        pending &= ~recovered
+        peak = np.where(new_peak, wealth, peak)
+        peak_month = np.where(new_peak, month + 1, peak_month)
+        underwater = np.where(new_peak, 0, underwater + 1)
+        max_underwater = np.maximum(max_underwater, underwater)
+
+        drawdown = wealth / peak - 1.0
+        deeper = drawdown < max_drawdown
+        max_drawdown = np.where(deeper, drawdown, max_drawdown)
+        max_drawdown_peak_month = np.where(deeper, peak_month, max_drawdown_peak_month)
+        recovery_months = np.where(deeper, -1, recovery_months)
+        pending |= deeper
+    return max_drawdown, max_underwater, recovery_months
+
+# --- Numba backend ---
+
+def _compile_numba_kernels():
+    import numba
+
+    @numba.njit(parallel=True)
+    def threshold_rebalance(asset_returns, target_weights, band, cost_rate):
+        num_simulations, num_months, num_assets = asset_returns.shape
+        num_portfolios = target_weights.shape[0]
+        growth = np.ones((num_simulations, num_portfolios))
+        cost_factor = np.ones((num_simulations, num_portfolios))
+        turnover = np.zeros((num_simulations, num_portfolios))
+        rebalances = np.zeros((num_simulations, num_portfolios), dtype=np.int64)
+        for s in numba.prange(num_simulations):
+            weights = np.empty(num_assets)
+            for p in range(num_portfolios):
+                for a in range(num_assets):
+                    weights[a] = target_weights[p, a]
+                for m in range(num_months):
+                    gross = 0.0
+                    for a in range(num_assets):
+                        weights[a] = weights[a] * (1.0 + asset_returns[s, m, a])
+                        gross += weights[a]
+                    largest = 0.0
+                    traded = 0.0
+                    for a in range(num_assets):
+                        weights[a] = weights[a] / gross
+                        deviation = abs(weights[a] - target_weights[p, a])
+                        largest = max(largest, deviation)
+                        traded += deviation
+                    growth[s, p] *= gross
+                    if largest > band and m < num_months - 1:
+                        cost_factor[s, p] = cost_factor[s, p] * (1.0 - cost_rate * traded)
+                        turnover[s, p] = turnover[s, p] + traded / 2.0
+                        rebalances[s, p] += 1
+                        for a in range(num_assets):
+                            weights[a] = target_weights[p, a]
+        return growth, cost_factor, turnover, rebalances
+
+    @numba.njit(parallel=True)
+    def guardrail_withdrawals(portfolio_returns, initial_rate, upper, lower, adjustment):
+        num_simulations, num_months = portfolio_returns.shape
+        terminal_wealth = np.empty(num_simulations)
+        total_withdrawn = np.zeros(num_simulations)
+        min_annual_withdrawal = np.empty(num_simulations)
+        depleted_month = np.full(num_simulations, -1, dtype=np.int64)
+        for s in numba.prange(num_simulations):
+            wealth = 1.0
+            annual_withdrawal = initial_rate
+            lowest = initial_rate
+            for m in range(num_months):
+                if m > 0 and m % num_months_in_year == 0 and wealth > 0.0:
+                    current_rate = annual_withdrawal / wealth
+                    if current_rate > initial_rate * upper:
+                        annual_withdrawal = annual_withdrawal * (1.0 - adjustment)
+                    elif current_rate < initial_rate * lower:
+                        annual_withdrawal = annual_withdrawal * (1.0 + adjustment)
+                    lowest = min(lowest, annual_withdrawal)
+                taken = min(annual_withdrawal / num_months_in_year, wealth)
+                total_withdrawn[s] += taken
+                wealth = (wealth - taken) * (1.0 + portfolio_returns[s, m])
+                if wealth <= 0.0 and depleted_month[s] < 0:
+                    depleted_month[s] = m
+                wealth = max(wealth, 0.0)
+            terminal_wealth[s] = wealth
+            min_annual_withdrawal[s] = lowest
+        return terminal_wealth, total_withdrawn, min_annual_withdrawal, depleted_month
+
+    @numba.njit(parallel=True)
+    def drawdown_recovery(portfolio_returns):
+        num_simulations, num_months = portfolio_returns.shape
+        max_drawdown = np.zeros(num_simulations)
+        max_underwater = np.zeros(num_simulations, dtype=np.int64)
+        recovery_months = np.full(num_simulations, -1, dtype=np.int64)
+        for s in numba.prange(num_simulations):
+            wealth = 1.0
+            peak = 1.0
+            peak_month = 0
+            worst = 0.0
+            worst_peak_month = 0
+            pending = False
+            underwater = 0
+            longest = 0
+            for m in range(num_months):
+                wealth = wealth * (1.0 + portfolio_returns[s, m])
+                if wealth >= peak:
+                    if pending:
+                        recovery_months[s] = m + 1 - worst_peak_month
+                        pending = False
+                    peak = wealth
+                    peak_month = m + 1
+                    underwater = 0
+                else:
+                    underwater += 1
+                longest = max(longest, underwater)
+                drawdown = wealth / peak - 1.0
+                if drawdown < worst:
+                    worst = drawdown
+                    worst_peak_month = peak_month
+                    recovery_months[s] = -1
+                    pending = True
+            max_drawdown[s] = worst
+            max_underwater[s] = longest
+        return max_drawdown, max_underwater, recovery_months
+
+    return {'threshold_rebalance': threshold_rebalance, 'guardrail_withdrawals': guardrail_withdrawals,
+            'drawdown_recovery': drawdown_recovery}
+
+def _numba_kernel(name: str):
+    global _numba_kernels
+    if _numba_kernels is None:
+        _numba_kernels = _compile_numba_kernels()
+    return _numba_kernels[name]
+
+# --- Public entry points ---
+
+def threshold_rebalance(asset_returns, target_weights, band: float = 0.05, cost_rate: float = 0.0, backend: str = None):
+    """
+    Tolerance-band rebalancing of every portfolio on every path.
+
+    asset_returns is (simulations x months x assets) and target_weights is (portfolios x assets). Weights drift
+    with returns; at the end of any month but the last where an asset is more than `band` away from its target
+    the portfolio is traded back to target, paying cost_rate on the traded value (sum of |drifted - target|).
+    Returns (growth, cost_factor, turnover, rebalances), each (simulations x portfolios): growth before costs,
+    the multiplicative wealth lost to costs (net wealth = growth * cost_factor), one-way turnover summed over
+    the horizon and the number of rebalances. band=0 rebalances every month.
+    """
+    asset_returns = np.ascontiguousarray(asset_returns, dtype=np.float64)
+    target_weights = np.ascontiguousarray(np.atleast_2d(target_weights), dtype=np.float64)
+    if _resolve(backend) == 'numba':
+        return _numba_kernel('threshold_rebalance')(asset_returns, target_weights, float(band), float(cost_rate))
+    return _threshold_rebalance_numpy(asset_returns, target_weights, float(band), float(cost_rate))
+
+def guardrail_withdrawals(portfolio_returns, initial_rate: float = 0.04, upper: float = 1.2, lower: float = 0.8,
+                          adjustment: float = 0.1, backend: str = None):
+    """
+    Guardrail withdrawals on (simulations x months) portfolio returns with starting wealth 1.
+
+    The annual withdrawal starts at initial_rate and is taken in equal monthly amounts at the start of each month.
+    At every year end it is cut by `adjustment` if it has risen above upper x initial_rate of current wealth,
+    or raised by `adjustment` if it has fallen below lower x initial_rate.
+    Returns (terminal_wealth, total_withdrawn, min_annual_withdrawal, depleted_month), with depleted_month -1
+    on paths that never run out.
+    """
+    portfolio_returns = np.ascontiguousarray(portfolio_returns, dtype=np.float64)
+    args = (float(initial_rate), float(upper), float(lower), float(adjustment))
+    if _resolve(backend) == 'numba':
+        return _numba_kernel('guardrail_withdrawals')(portfolio_returns, *args)
+    return _guardrail_withdrawals_numpy(portfolio_returns, *args)
+
+def drawdown_recovery(portfolio_returns, backend: str = None):
+    """
+    Drawdown statistics with recovery tracking on (simulations x months) portfolio returns.
+    Returns (max_drawdown, max_underwater_months, recovery_months) where recovery_months counts the months from
+    the peak before the maximum drawdown until wealth is back at that peak, or -1 if it never recovers.
+    """
+    portfolio_returns = np.ascontiguousarray(portfolio_returns, dtype=np.float64)
+    if _resolve(backend) == 'numba':
+        return _numba_kernel('drawdown_recovery')(portfolio_returns)
+    return _drawdown_recovery_numpy(portfolio_returns)
@@ -0,0 +1,179 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.optimize import linprog
+from scipy.stats import norm
+from retirement_planner.data import num_months_in_year
+from retirement_planner.evaluate import asset_returns_chunk, evaluate_portfolios
+from retirement_planner.frontier import risk_band_definitions
+
+# Scenario-based portfolio optimisation on the simulated paths.
+#
+# Scenarios are horizon returns (12 months by default) of every asset, sampled from the store.
+# CVaR uses the Rockafellar-Uryasev linearisation: CVaR_beta = min_alpha alpha + sum(max(loss_s - alpha, 0)) / ((1 - beta) S),
+# which adds one variable per scenario and keeps the problem a sparse LP that HiGHS solves quickly for
+# tens of thousands of scenarios.
+# Drawdowns use the Chekhlov et al. linearisation on a subsample of paths: with uncompounded cumulative
+# returns y_t = C_t . w, a running peak u_t >= y_t, u_t >= u_{t-1} and u_t - y_t <= dd bounds the maximum drawdown.
+#
+# The median of terminal wealth is not linear in the weights, so the LP maximises the mean scenario return
+# as its proxy; the actual median terminal wealth of each solution is then measured on the full store.
+
+default_confidence = 0.95
+
+def sample_scenarios(simulated_asset_paths: dict, asset_names: list, horizon_months: int = num_months_in_year,
+                     max_scenarios: int = 20000, seed=None):
+    """
+    Builds the (scenarios x assets) matrix of compounded horizon returns. Every path is cut into
+    non-overlapping horizon blocks and, if there are more blocks than max_scenarios, a random subset is kept.
+    """
+    num_simulations, num_months = simulated_asset_paths[asset_names[0]].shape
+    blocks_per_path = num_months // horizon_months
+    if blocks_per_path == 0:
+        raise ValueError(f"Scenario horizon of {horizon_months} months is longer than the {num_months} simulated months.")
+
+    rng = np.random.default_rng(seed)
+    total_blocks = num_simulations * blocks_per_path
+    chosen = np.arange(total_blocks) if total_blocks <= max_scenarios else np.sort(rng.choice(total_blocks, max_scenarios, replace=False))
+    chosen_sims = chosen // blocks_per_path
+    chosen_blocks = chosen % blocks_per_path
+
+    scenarios = np.empty((len(chosen), len(asset_names)))
+    for asset_idx, asset_name in enumerate(asset_names):
+        asset_paths = simulated_asset_paths[asset_name]
+        # Sorted unique rows keep reads from a memory-mapped store sequential
+        unique_sims, inverse = np.unique(chosen_sims, return_inverse=True)
+        rows = np.asarray(asset_paths[unique_sims, :blocks_per_path * horizon_months]).reshape(len(unique_sims), blocks_per_path, horizon_months)
+        scenarios[:, asset_idx] = np.prod(1 + rows[inverse, chosen_blocks], axis=1) - 1
+    return scenarios
+
+def sample_drawdown_paths(simulated_asset_paths: dict, asset_names: list, num_paths: int = 100, num_months: int = 60, seed=None):
+    """
+    Cumulative (uncompounded) monthly asset returns for a random subset of paths: (paths x months x assets).
+    """
+    num_simulations = simulated_asset_paths[asset_names[0]].shape[0]
+    rng = np.random.default_rng(seed)
+    sims = np.sort(rng.choice(num_simulations, min(num_paths, num_simulations), replace=False))
+    block = np.stack([asset_returns_chunk(simulated_asset_paths, asset_names, sim, sim + 1, num_months)[0] for sim in sims])
+    return np.cumsum(block, axis=1)
+
+def cvar_multiplier(confidence: float = default_confidence) -> float:
+    """
+    CVaR of a standard normal at the given confidence. A normal return with volatility sigma has a
+    mean-deviation CVaR of sigma times this, which is how the volatility bands are translated into CVaR limits.
+    """
+    return norm.pdf(norm.ppf(confidence)) / (1 - confidence)
+
+def solve_scenario_portfolio(scenarios, objective: str = 'min_cvar', confidence: float = default_confidence,
+                             cvar_limit: float = None, drawdown_paths=None, dd_max: float = None, max_weight: float = 1.0):
+    """
+    Solves a long-only portfolio LP over the scenario matrix.
+
+    objective='min_cvar' minimises CVaR of the scenario loss. objective='max_return' maximises the mean
+    scenario return subject to a mean-deviation CVaR limit (CVaR + mean <= cvar_limit) and, when drawdown_paths
+    is given, a maximum drawdown of |dd_max| on every sampled path.
+    Returns (weights, info) where info has the LP status message and the CVaR / mean of the solution,
+    or (None, info) if the constraints cannot be met.
+    """
+    if objective not in ('min_cvar', 'max_return'):
+        raise ValueError(f"Unknown objective '{objective}'. Use 'min_cvar' or 'max_return'.")
+    scenarios = np.asarray(scenarios, dtype=np.float64)
+    num_scenarios, num_assets = scenarios.shape
+    mean_returns = scenarios.mean(axis=0)
+    tail_weight = 1 / ((1 - confidence) * num_scenarios)
+
+    use_drawdown = drawdown_paths is not None and dd_max is not None and abs(dd_max) < 1
+    num_paths, num_months = drawdown_paths.shape[:2] if use_drawdown else (0, 0)
+    num_peaks = num_paths * num_months
+
+    # Variables: [weights (assets), alpha (VaR level), excess losses (scenarios), running peaks (paths x months)]
+    num_variables = num_assets + 1 + num_scenarios + num_peaks
+    alpha_col = num_assets
+    excess_cols = slice(num_assets + 1, num_assets + 1 + num_scenarios)
+    cvar_row = np.zeros(num_variables)
+    cvar_row[alpha_col] = 1.0
+    cvar_row[excess_cols] = tail_weight
+
+    # Excess loss: -R_s . w - alpha - z_s <= 0
+    blocks = [sp.hstack([sp.csr_matrix(-scenarios), sp.csr_matrix(-np.ones((num_scenarios, 1))),
+                         -sp.identity(num_scenarios, format='csr'), sp.csr_matrix((num_scenarios, num_peaks))])]
+    upper_bounds = [np.zeros(num_scenarios)]
+
+    if objective == 'max_return' and cvar_limit is not None:
+        limit_row = cvar_row.copy()
+        limit_row[:num_assets] = mean_returns
+        blocks.append(sp.csr_matrix(limit_row))
+        upper_bounds.append(np.array([cvar_limit]))
+
+    if use_drawdown:
+        cumulative = sp.csr_matrix(drawdown_paths.reshape(num_peaks, num_assets))
+        peaks = sp.identity(num_peaks, format='csr')
+        # Previous peak within the same path; the first month's previous peak is the starting value 0 (u >= 0 bound)
+        previous = sp.diags(np.ones(num_peaks - 1), -1, format='lil')
+        for path in range(1, num_paths):
+            previous[path * num_months, path * num_months - 1] = 0
+        previous = previous.tocsr()
+        padding = sp.csr_matrix((num_peaks, 1 + num_scenarios))
+        blocks.append(sp.hstack([cumulative, padding, -peaks]))                           # y_t - u_t <= 0
+        upper_bounds.append(np.zeros(num_peaks))
+        blocks.append(sp.hstack([sp.csr_matrix((num_peaks, num_assets)), padding, previous - peaks]))  # u_{t-1} - u_t <= 0
+        upper_bounds.append(np.zeros(num_peaks))
+        blocks.append(sp.hstack([-cumulative, padding, peaks]))                           # u_t - y_t <= dd
+        upper_bounds.append(np.full(num_peaks, abs(dd_max)))
+
+    cost = cvar_row.copy() if objective == 'min_cvar' else np.concatenate([-mean_returns, np.zeros(num_variables - num_assets)])
+    equality = np.zeros((1, num_variables))
+    equality[0, :num_assets] = 1.0
+    bounds = [(0.0, max_weight)] * num_assets + [(None, None)] + [(0.0, None)] * (num_scenarios + num_peaks)
+
+    result = linprog(cost, A_ub=sp.vstack(blocks, format='csr'), b_ub=np.concatenate(upper_bounds),
+                     A_eq=equality, b_eq=[1.0], bounds=bounds, method='highs')
+    info = {'status': result.message}
+    if not result.success:
+        return None, info
+
+    weights = np.clip(result.x[:num_assets], 0.0, None)
+    weights /= weights.sum()
+    losses = -scenarios @ weights
+    var_level = np.quantile(losses, confidence)
+    info['mean_return'] = float(mean_returns @ weights)
+    info['cvar'] = float(var_level + np.maximum(losses - var_level, 0).sum() * tail_weight)
+    return weights, info
+
+def risk_band_portfolios(simulated_asset_paths: dict, asset_names: list, bands: dict = risk_band_definitions,
+                         confidence: float = default_confidence, horizon_months: int = num_months_in_year, max_scenarios: int = 20000,
+                         drawdown_paths: int = 100, drawdown_months: int = 60, max_weight: float = 1.0, seed=None):
+    """
+    One model portfolio per risk band: maximise mean scenario return subject to a CVaR limit equivalent
+    to the band's vol_max and a maximum drawdown of the band's dd_max on the sampled paths. Bands whose
+    constraints cannot be met fall back to the minimum-CVaR portfolio (ValueError if that has no solution either).
+    Median terminal wealth over the whole store is reported for every portfolio.
+    """
+    scenarios = sample_scenarios(simulated_asset_paths, asset_names, horizon_months, max_scenarios, seed)
+    cumulative_paths = sample_drawdown_paths(simulated_asset_paths, asset_names, drawdown_paths, drawdown_months, seed)
+    annualization = np.sqrt(num_months_in_year / horizon_months)
+    print(f"Scenario matrix: {scenarios.shape[0]} scenarios x {scenarios.shape[1]} assets; "
+          f"drawdown sample: {cumulative_paths.shape[0]} paths x {cumulative_paths.shape[1]} months")
+
+    min_cvar_weights, min_cvar_info = solve_scenario_portfolio(scenarios, 'min_cvar', confidence, max_weight=max_weight)
+    rows = []
+    for risk_level, band in bands.items():
+        cvar_limit = band['vol_max'] / annualization * cvar_multiplier(confidence)
+        weights, info = solve_scenario_portfolio(scenarios, 'max_return', confidence, cvar_limit, cumulative_paths, band['dd_max'], max_weight)
+        fallback = weights is None
+        if fallback:
+            if min_cvar_weights is None:
+                raise ValueError(f"Risk level {risk_level}: constraints cannot be met ({info['status']}) and the minimum-CVaR "
+                                 f"fallback failed too ({min_cvar_info['status']}). Check max_weight={max_weight:g} "
+                                 f"allows fully invested weights across {len(asset_names)} assets.")
+            print(f"Risk level {risk_level}: constraints cannot be met ({info['status']}). Using the minimum-CVaR portfolio.")
+            weights, info = min_cvar_weights, min_cvar_info
+        rows.append({'Risk_Level': risk_level, 'Mean_Scenario_Return': info['mean_return'], 'CVaR': info['cvar'],
+                     'CVaR_Limit': cvar_limit, 'dd_max': band['dd_max'], 'Fallback_Min_CVaR': fallback,
+                     **dict(zip(asset_names, weights))})
+
+    model_portfolios = pd.DataFrame(rows).set_index('Risk_Level')
+    outcomes = evaluate_portfolios(simulated_asset_paths, asset_names, model_portfolios[asset_names].to_numpy(), percentiles=[50])
+    model_portfolios.insert(0, 'Median_Terminal_Wealth', outcomes['terminal_wealth_percentiles'][:, 0])
+    model_portfolios.insert(1, 'Median_Max_Drawdown', outcomes['median_max_drawdown'])
+    return model_portfolios
@@ -0,0 +1,134 @@
+import numpy as np
+import os
+from retirement_planner.data import num_months_in_year
+from retirement_planner.store import load_simulated_paths, simulated_returns_file
+
+# Optional companion index for the simulation store: cumulative log-returns along the months axis.
+# With a leading zero column, index[:, m] is the log growth over the first m months, so the return
+# between any two months is expm1(index[:, end] - index[:, start]) and every rolling window across
+# every path is a single vectorized difference of two slices.
+
+log_index_suffix = '_log_index.npy'
+total_loss_floor = -1 + 1e-12
+
+def log_index_file(output_folder: str, name: str) -> str:
+    return os.path.join(output_folder, f"{name}{log_index_suffix}")
+
+def build_log_return_index(monthly_returns):
+    """
+    Builds the (simulations x months + 1) cumulative log-return index for a (simulations x months) array.
+    """
+    monthly_returns = np.asarray(monthly_returns)
+    index = np.zeros((monthly_returns.shape[0], monthly_returns.shape[1] + 1))
+    # A -100% month would make the index -inf and every later window NaN, so floor losses just above total loss
+    np.cumsum(np.log1p(np.maximum(monthly_returns, total_loss_floor)), axis=1, out=index[:, 1:])
+    return index
+
+def portfolio_monthly_returns(simulated_asset_paths: dict, weights: dict, start: int = 0, stop: int = None):
+    """
+    Monthly returns of a fixed-weight portfolio rebalanced every month, for simulations [start, stop).
+    `weights` maps asset name -> weight; assets that are not listed get zero weight.
+    """
+    portfolio_returns = None
+    for asset_name, weight in weights.items():
+        if weight == 0:
+            continue
+        contribution = weight * np.asarray(simulated_asset_paths[asset_name][start:stop], dtype=np.float64)
+        portfolio_returns = contribution if portfolio_returns is None else portfolio_returns + contribution
+    if portfolio_returns is None:
+        raise ValueError("Portfolio has no non-zero weights.")
+    return portfolio_returns
+
+def _write_index(file_path: str, num_simulations: int, num_months: int, monthly_returns_for_chunk, chunk_size: int):
+    index = np.lib.format.open_memmap(file_path, mode='w+', dtype=np.float64, shape=(num_simulations, num_months + 1))
+    for start in range(0, num_simulations, chunk_size):
+        stop = min(start + chunk_size, num_simulations)
+        index[start:stop] = build_log_return_index(monthly_returns_for_chunk(start, stop))
+    index.flush()
+    return index
+
+def build_asset_indexes(output_folder: str, asset_names: list = None, chunk_size: int = 1000):
+    """
+    Writes <asset>_log_index.npy next to each <asset>_simulated_returns.npy in the store.
+    Works chunk by chunk over simulations so the store never has to fit in memory.
+    """
+    simulated_asset_paths = load_simulated_paths(output_folder, asset_names, mmap_mode='r')
+    for asset_name, paths in simulated_asset_paths.items():
+        file_path = log_index_file(output_folder, asset_name)
+        _write_index(file_path, paths.shape[0], paths.shape[1], lambda start, stop: paths[start:stop], chunk_size)
+        print(f"Saved log-return index for {asset_name} to {file_path}")
+
+def build_portfolio_index(output_folder: str, weights: dict, portfolio_name: str, chunk_size: int = 1000):
+    """
+    Writes <portfolio_name>_log_index.npy for a fixed-weight, monthly rebalanced portfolio.
+    """
+    simulated_asset_paths = load_simulated_paths(output_folder, list(weights), mmap_mode='r')
+    num_simulations, num_months = next(iter(simulated_asset_paths.values())).shape
+    file_path = log_index_file(output_folder, portfolio_name)
+    index = _write_index(file_path, num_simulations, num_months,
+                         lambda start, stop: portfolio_monthly_returns(simulated_asset_paths, weights, start, stop), chunk_size)
+    print(f"Saved log-return index for portfolio {portfolio_name} to {file_path}")
+    return index
+
+def load_log_index(output_folder: str, name: str, mmap_mode: str = 'r'):
+    return np.load(log_index_file(output_folder, name), mmap_mode=mmap_mode)
+
+def current_asset_log_index(output_folder: str, asset_name: str, mmap_mode: str = 'r'):
+    """
+    The asset's stored index if there is one matching its simulated returns, otherwise None. An index older
+    than the returns file (left behind by a later run without --build-index) or of the wrong shape does not match.
+    """
+    index_file = log_index_file(output_folder, asset_name)
+    returns_file = simulated_returns_file(output_folder, asset_name)
+    if not os.path.exists(index_file) or os.path.getmtime(index_file) < os.path.getmtime(returns_file):
+        return None
+    index = load_log_index(output_folder, asset_name, mmap_mode)
+    num_simulations, num_months = np.load(returns_file, mmap_mode='r').shape
+    return index if index.shape == (num_simulations, num_months + 1) else None
+
+def window_returns(index, start_month: int, end_month: int, annualize: bool = False):
+    """
+    Return from start_month to end_month (month counts from the start of the horizon) for every simulation.
+    For example, years 5 to 20 are start_month=60, end_month=240.
+    """
+    if not 0 <= start_month < end_month < index.shape[1]:
+        raise ValueError(f"Window must satisfy 0 <= start < end <= {index.shape[1] - 1}, got ({start_month}, {end_month})")
+    log_growth = np.asarray(index[:, end_month]) - np.asarray(index[:, start_month])
+    if annualize:
+        log_growth = log_growth * num_months_in_year / (end_month - start_month)
+    return np.expm1(log_growth)
+
+def _check_window(index, window_months: int):
+    if not 0 < window_months < index.shape[1]:
+        raise ValueError(f"Window of {window_months} months does not fit in a {index.shape[1] - 1} month horizon.")
+
+def rolling_window_returns(index, window_months: int, annualize: bool = False):
+    """
+    Returns for every window of window_months on every path, shape (simulations x months - window + 1).
+    """
+    index = np.asarray(index)
+    _check_window(index, window_months)
+    log_growth = index[:, window_months:] - index[:, :-window_months]
+    if annualize:
+        log_growth *= num_months_in_year / window_months
+    return np.expm1(log_growth)
+
+def worst_rolling_returns(index, window_months: int, annualize: bool = False):
+    """
+    Worst window_months return on each path. Since expm1 is monotonic the minimum is taken on log growth.
+    """
+    index = np.asarray(index)
+    _check_window(index, window_months)
+    worst_log_growth = (index[:, window_months:] - index[:, :-window_months]).min(axis=1)
+    if annualize:
+        worst_log_growth = worst_log_growth * num_months_in_year / window_months
+    return np.expm1(worst_log_growth)
+
+def rolling_return_percentiles(index, window_months: int, percentiles=(5, 25, 50, 75, 95), annualize: bool = True, chunk_size: int = 1000):
+    """
+    Percentiles of the pooled distribution of all rolling window returns across all paths.
+    Chunks over simulations when the index is memory-mapped; the pooled windows are kept as float32.
+    """
+    pooled = [rolling_window_returns(index[start:start + chunk_size], window_months, annualize).astype(np.float32).ravel()
+              for start in range(0, index.shape[0], chunk_size)]
+    return np.percentile(np.concatenate(pooled), percentiles)
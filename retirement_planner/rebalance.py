@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+from retirement_planner.data import num_months_in_year
+from retirement_planner.evaluate import asset_returns_chunk, default_memory_budget, default_percentiles
+from retirement_planner.kernels import threshold_rebalance
+
+# Rebalancing policies evaluated over the (simulations x months x assets) cube, vectorized across
+# simulations and portfolios:
+#  - 'none':     buy and hold, weights drift for the whole horizon
+#  - 'monthly' / 'annual': calendar rebalancing back to target at the end of every month / year
+#  - 'band:X':   tolerance-band rebalancing whenever an asset drifts more than X from its target
+# Trading costs cost_rate on the traded value (sum of |drifted - target| weights) at every rebalance.
+# No policy rebalances at the end of the horizon: that trade would change nothing but the costs.
+#
+# Between rebalances a portfolio is buy and hold, so calendar policies only need the growth of each asset
+# over each period: no loop over months. Band rebalancing is path dependent and runs in the compiled kernel.
+# Because drift does not depend on wealth, costs come out as a separate multiplicative factor:
+# net wealth = gross growth x cost factor, and cost drag is the annualized log of that factor.
+
+calendar_periods = {'monthly': 1, 'annual': num_months_in_year}
+
+def parse_policy(policy: str):
+    """
+    Returns (kind, parameter): ('none', None), ('calendar', months) or ('band', width).
+    """
+    if policy == 'none':
+        return 'none', None
+    if policy in calendar_periods:
+        return 'calendar', calendar_periods[policy]
+    if policy.startswith('band:'):
+        try:
+            width = float(policy.split(':', 1)[1])
+        except ValueError:
+            raise ValueError(f"Band policy '{policy}' needs a numeric width, e.g. 'band:0.05'.") from None
+        if width < 0:
+            raise ValueError(f"Band width must be non-negative, got {width}")
+        return 'band', width
+    raise ValueError(f"Unknown rebalancing policy '{policy}'. Use 'none', 'monthly', 'annual' or 'band:<width>'.")
+
+def buy_and_hold(asset_returns, weights):
+    """
+    Growth of each portfolio with no rebalancing: (simulations x portfolios).
+    """
+    return np.prod(1 + asset_returns, axis=1) @ weights.T
+
+def calendar_rebalance(asset_returns, weights, period_months: int, cost_rate: float = 0.0):
+    """
+    Rebalances to target at the end of every period_months except the last (a shorter final period is allowed).
+    Returns (growth, cost_factor, turnover, rebalances), each (simulations x portfolios).
+    """
+    num_simulations, num_months, _ = asset_returns.shape
+    num_periods = -(-num_months // period_months)
+    growth_factors = 1 + asset_returns
+    if num_periods * period_months != num_months:
+        # Pad a partial final period with zero returns, which leaves its growth unchanged
+        growth_factors = np.ones((num_simulations, num_periods * period_months, asset_returns.shape[2]))
+        growth_factors[:, :num_months] += asset_returns
+    asset_growth = np.prod(growth_factors.reshape(num_simulations, num_periods, period_months, -1), axis=2)   # (sims x periods x assets)
+
+    period_growth = asset_growth @ weights.T                                                          # (sims x periods x portfolios)
+    # Drifted weight minus target is w_a * (G_a - g) / g, so the traded value is sum_a w_a |G_a - g| / g
+    traded = np.abs(asset_growth[:, :, None, :] - period_growth[:, :, :, None])
+    traded = np.einsum('sypa,pa->syp', traded, weights) / period_growth
+
+    # The final period ends at the horizon, where there is nothing to rebalance for
+    traded = traded[:, :-1]
+    growth = np.prod(period_growth, axis=1)
+    cost_factor = np.prod(1 - cost_rate * traded, axis=1)
+    return growth, cost_factor, traded.sum(axis=1) / 2, np.full(growth.shape, num_periods - 1)
+
+def rebalance_chunk(asset_returns, weights, policy: str, cost_rate: float = 0.0, backend: str = None):
+    kind, parameter = parse_policy(policy)
+    if kind == 'none':
+        growth = buy_and_hold(asset_returns, weights)
+        return growth, np.ones_like(growth), np.zeros_like(growth), np.zeros(growth.shape, dtype=np.int64)
+    if kind == 'calendar':
+        return calendar_rebalance(asset_returns, weights, parameter, cost_rate)
+    return threshold_rebalance(asset_returns, weights, parameter, cost_rate, backend)
+
+def compare_rebalancing_policies(simulated_asset_paths: dict, asset_names: list, weights, policies: list, cost_rate: float = 0.001,
+                                 horizon_months: int = None, portfolio_names: list = None, percentiles=default_percentiles,
+                                 memory_budget: int = default_memory_budget, backend: str = None):
+    """
+    Runs every policy for every (portfolios x assets) weight vector over every simulated path, streaming
+    over the store in chunks of simulations. Returns one row per (portfolio, policy) with terminal wealth
+    percentiles, annual one-way turnover, annualized cost drag and rebalances per year.
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    for policy in policies:
+        parse_policy(policy)
+    num_simulations, store_months = simulated_asset_paths[asset_names[0]].shape
+    horizon_months = store_months if horizon_months is None else horizon_months
+    num_portfolios = weights.shape[0]
+    if portfolio_names is None:
+        portfolio_names = [f"Portfolio_{i+1}" for i in range(num_portfolios)]
+    years = horizon_months / num_months_in_year
+
+    # The largest temporary is the calendar policy's (sims x periods x portfolios x assets) block
+    chunk_size = max(1, int(memory_budget // (8 * horizon_months * len(asset_names) * (2 + num_portfolios))))
+    results = {policy: {name: np.empty((num_simulations, num_portfolios)) for name in ('wealth', 'turnover', 'drag', 'rebalances')}
+               for policy in policies}
+    for start in range(0, num_simulations, chunk_size):
+        stop = min(start + chunk_size, num_simulations)
+        asset_returns = asset_returns_chunk(simulated_asset_paths, asset_names, start, stop, horizon_months)
+        for policy in policies:
+            growth, cost_factor, turnover, rebalances = rebalance_chunk(asset_returns, weights, policy, cost_rate, backend)
+            results[policy]['wealth'][start:stop] = growth * cost_factor
+            results[policy]['turnover'][start:stop] = turnover / years
+            with np.errstate(divide='ignore'):
+                results[policy]['drag'][start:stop] = -np.log(cost_factor) / years
+            results[policy]['rebalances'][start:stop] = rebalances / years
+
+    rows = []
+    wealth_percentiles = {policy: np.percentile(results[policy]['wealth'], percentiles, axis=0) for policy in policies}
+    for p, portfolio_name in enumerate(portfolio_names):
+        for policy in policies:
+            row = {'Portfolio': portfolio_name, 'Policy': policy}
+            row.update({f"Wealth_P{percentile:g}": value for percentile, value in zip(percentiles, wealth_percentiles[policy][:, p])})
+            row['Annual_Turnover'] = results[policy]['turnover'][:, p].mean()
+            row['Annual_Cost_Drag'] = results[policy]['drag'][:, p].mean()
+            row['Rebalances_Per_Year'] = results[policy]['rebalances'][:, p].mean()
+            rows.append(row)
+    return pd.DataFrame(rows).set_index(['Portfolio', 'Policy'])
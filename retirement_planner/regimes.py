@@ -0,0 +1,107 @@
+import numpy as np
+from retirement_planner.data import boe_rates_file
+
+# Regime-aware conditional bootstrap.
+# Every historical month is labelled with a regime, either from the BoE base rate in force at the start
+# of the month or from the trailing volatility of the equal-weight portfolio. Months are indexed once by
+# regime (sorted month indices plus per-regime offsets) and a Markov transition matrix is estimated from
+# consecutive labels, wrapping from the last month back to the first.
+#
+# A simulated path follows the regime chain and each month is drawn from the current regime's bucket.
+# The chain is simulated without a loop over months: each month's uniform draw turns the transition matrix
+# into a map state -> next state, and the prefix compositions of those maps (a Hillis-Steele scan, log2(months)
+# vectorized steps) give the regime of every month on every path from the starting regime.
+
+default_rate_thresholds = (1.0, 3.0)           # % base rate: below 1, 1 to 3, 3 and above
+default_volatility_window = 12
+default_volatility_regimes = 3
+default_transition_smoothing = 0.0
+
+def rate_regime_labels(dates, rates_file: str = boe_rates_file, thresholds=default_rate_thresholds):
+    """
+    Regime of each month from the BoE base rate in force on the first day of the month.
+    """
+    from retirement_planner.accrue import read_boe
+    boe_rates = sorted(read_boe(rates_file), key=lambda entry: entry.date)
+    change_dates = np.array([entry.date for entry in boe_rates], dtype='datetime64[D]')
+    rates = np.array([entry.annual_rate for entry in boe_rates])
+    month_starts = np.asarray(dates, dtype='datetime64[M]').astype('datetime64[D]')
+    in_force = np.searchsorted(change_dates, month_starts, side='right') - 1
+    if (in_force < 0).any():
+        raise ValueError(f"The BoE rates in '{rates_file}' start after the first month of returns.")
+    return np.searchsorted(np.asarray(thresholds, dtype=np.float64), rates[in_force], side='right')
+
+def volatility_regime_labels(monthly_returns_df, window: int = default_volatility_window, num_regimes: int = default_volatility_regimes):
+    """
+    Regime of each month from the trailing volatility of the equal-weight portfolio (including the month
+    itself), split into num_regimes equally populated buckets. The first months use the volatility so far.
+    """
+    equal_weight_returns = monthly_returns_df.mean(axis=1)
+    trailing_volatility = equal_weight_returns.rolling(window, min_periods=2).std().bfill().to_numpy()
+    cut_points = np.quantile(trailing_volatility, np.arange(1, num_regimes) / num_regimes)
+    return np.searchsorted(cut_points, trailing_volatility, side='right')
+
+def regime_buckets(labels):
+    """
+    Indexes months by regime once. Returns (labels renumbered 0..K-1 over the regimes that occur,
+    month indices sorted by regime, months per regime, offset of each regime's first month).
+    """
+    _, labels = np.unique(labels, return_inverse=True)
+    months_by_regime = np.argsort(labels, kind='stable')
+    counts = np.bincount(labels)
+    offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    return labels, months_by_regime, counts, offsets
+
+def transition_matrix(labels, num_regimes: int, smoothing: float = default_transition_smoothing, circular: bool = True):
+    """
+    Markov transition probabilities from counts of consecutive months, plus `smoothing` pseudo-counts per cell.
+    With circular=True the history wraps around (last month -> first month), as in a circular block bootstrap:
+    every regime that occurs then has an exit and the stationary distribution is exactly the empirical regime
+    frequencies. Otherwise a regime seen only at the end of a short history (e.g. the 2022-2025 high rates)
+    would be absorbing. A regime with no observed transition stays where it is.
+    """
+    transitions = np.full((num_regimes, num_regimes), float(smoothing))
+    next_labels = np.roll(labels, -1) if circular else labels[1:]
+    np.add.at(transitions, (labels[:len(next_labels)], next_labels), 1)
+    transitions[transitions.sum(axis=1) == 0] = np.eye(num_regimes)[transitions.sum(axis=1) == 0]
+    return transitions / transitions.sum(axis=1, keepdims=True)
+
+def simulate_regime_chain(rng, num_paths: int, num_months: int, transitions, initial_regime: int):
+    """
+    (paths x months) regimes of a Markov chain that starts from initial_regime before the first month.
+    """
+    num_regimes = transitions.shape[0]
+    cumulative = np.cumsum(transitions, axis=1)
+    cumulative[:, -1] = 1.0
+    uniforms = rng.random((num_paths, num_months))
+    # maps[p, t, i] is the regime after month t on path p given regime i before it
+    maps = (uniforms[:, :, None, None] >= cumulative[None, None, :, :]).sum(axis=3)
+    maps = np.minimum(maps, num_regimes - 1).astype(np.int8 if num_regimes < 128 else np.int64)
+
+    # Inclusive prefix composition: after the step with shift d, maps[:, t] composes months max(0, t-2d+1)..t
+    shift = 1
+    while shift < num_months:
+        later = maps[:, shift:]
+        earlier = maps[:, :-shift]
+        maps[:, shift:] = np.take_along_axis(later, earlier.astype(np.int64), axis=2)
+        shift *= 2
+    return maps[:, :, initial_regime].astype(np.int64)
+
+def regime_index(labels, initial_regime: int = None) -> dict:
+    """
+    Everything the conditional bootstrap needs, built once per run. By default the chain continues from
+    the regime of the last historical month.
+    """
+    labels, months_by_regime, counts, offsets = regime_buckets(labels)
+    return {'months_by_regime': months_by_regime, 'counts': counts, 'offsets': offsets,
+            'transitions': transition_matrix(labels, len(counts)),
+            'initial_regime': int(labels[-1] if initial_regime is None else initial_regime)}
+
+def generate_regime_bootstrap_chunk(rng, num_paths: int, num_months: int, historical_returns, index: dict):
+    """
+    Conditional bootstrap: each simulated month is a random historical month (all assets together) from
+    the bucket of the regime the chain is in.
+    """
+    regimes = simulate_regime_chain(rng, num_paths, num_months, index['transitions'], index['initial_regime'])
+    draws = (rng.random((num_paths, num_months)) * index['counts'][regimes]).astype(np.int64)
+    return historical_returns[index['months_by_regime'][index['offsets'][regimes] + draws]]
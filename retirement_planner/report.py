@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+from retirement_planner.data import num_months_in_year
+from retirement_planner.evaluate import default_memory_budget, weights_matrix
+from retirement_planner.path_index import current_asset_log_index
+from retirement_planner.rolling import rolling_correlations_and_volatilities, summarise_rolling_correlations
+from retirement_planner.store import list_simulated_assets, load_simulated_paths
+from retirement_planner.summaries import historical_comparison, summarise_store
+
+# Sanity checks: statistics of the historical GBP panel and of the simulated paths in the store.
+
+def historical_report(combined_monthly_returns_gbp, rolling_windows=(12, 24, 36, 60)):
+    print("\nMean Monthly Returns (GBP):")
+    print(combined_monthly_returns_gbp.mean())
+    print("\nMonthly Standard Deviations (GBP):")
+    print(combined_monthly_returns_gbp.std())
+    print("\nCorrelation Matrix (GBP):")
+    print(combined_monthly_returns_gbp.corr())
+    print("\nCovariance Matrix (GBP):")
+    print(combined_monthly_returns_gbp.cov())
+
+    # Rolling correlations and volatilities across several window lengths (one pass over the panel)
+    rolling_windows = list(rolling_windows)
+    rolling_correlations, rolling_volatilities = rolling_correlations_and_volatilities(combined_monthly_returns_gbp, rolling_windows)
+    print(f"\nRolling correlation cube shape (windows x months x assets x assets): {rolling_correlations.shape}")
+    print("\nAverage pairwise correlation by rolling window length:")
+    print(summarise_rolling_correlations(rolling_correlations, rolling_windows, combined_monthly_returns_gbp.columns))
+    print("\nLatest annualized rolling volatilities by window length:")
+    print(pd.DataFrame(rolling_volatilities[:, -1, :], index=rolling_windows, columns=combined_monthly_returns_gbp.columns))
+
+def annual_returns(monthly_returns):
+    """
+    Compounded return of each 12-month year on each path: (simulations x months) -> (simulations x years).
+    Months beyond the last full year are ignored.
+    """
+    monthly_returns = np.asarray(monthly_returns)
+    num_years = monthly_returns.shape[1] // num_months_in_year
+    years = monthly_returns[:, :num_years * num_months_in_year].reshape(monthly_returns.shape[0], num_years, num_months_in_year)
+    return np.prod(1 + years, axis=2) - 1
+
+def simulated_report(output_folder: str, window_years=(10,), memory_budget: int = default_memory_budget,
+                     historical_returns_df=None, portfolios: dict = None):
+    """
+    Statistics of the store computed in one pass over aligned blocks of simulations, so memory use is
+    bounded by memory_budget whatever the number of paths. portfolios maps a name to a dict of asset weights.
+    """
+    asset_names = list_simulated_assets(output_folder)
+    simulated_asset_paths = load_simulated_paths(output_folder, asset_names, mmap_mode='r')
+    num_simulations, planning_horizon_months = simulated_asset_paths[asset_names[0]].shape
+    print(f"\nTotal simulations: {num_simulations}")
+    print(f"Planning horizon: {planning_horizon_months // num_months_in_year} years ({planning_horizon_months} months)")
+
+    print("\n--- Annual Returns by Asset ---")
+    for asset_name in asset_names:
+        annual_df = pd.DataFrame(annual_returns(simulated_asset_paths[asset_name][:5]))
+        annual_df.columns = [f"Year_{i+1}" for i in annual_df.columns]
+        annual_df.index = [f"Sim_{i+1}" for i in annual_df.index]
+        print(f"\n--- Sample Annual Returns for {asset_name} (First 5 Simulations) ---")
+        print(annual_df.head())
+
+    # Every asset on its own (identity weights) followed by the requested portfolios, all in the same pass.
+    # Assets with a companion log index (simulate --build-index) read it instead of rebuilding it.
+    portfolios = portfolios or {}
+    weights = np.vstack([np.eye(len(asset_names))] + [weights_matrix(portfolio, asset_names) for portfolio in portfolios.values()])
+    log_indexes = [current_asset_log_index(output_folder, asset_name) for asset_name in asset_names] + [None] * len(portfolios)
+    summaries, portfolio_summaries = summarise_store(simulated_asset_paths, asset_names, memory_budget, weights,
+                                                     asset_names + list(portfolios), window_years, log_indexes)
+
+    with pd.option_context('display.max_columns', None, 'display.width', 200):
+        print("\n--- Simulated Return Distribution by Asset ---")
+        print(summaries.table())
+        print("\n--- Terminal Wealth and Worst Rolling Returns (annualized) ---")
+        print(portfolio_summaries.table())
+        if historical_returns_df is not None:
+            moments, correlations = historical_comparison(summaries, historical_returns_df)
+            print("\n--- Simulated vs Historical Moments ---")
+            print(moments)
+            print("\n--- Simulated vs Historical Correlations (largest differences) ---")
+            print(correlations.reindex(correlations['Difference'].abs().sort_values(ascending=False).index).head(10).to_string(index=False))
+            print(f"Largest absolute correlation difference: {correlations['Difference'].abs().max():.4f}")
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+from retirement_planner.data import num_months_in_year
+
+# Rolling-window correlation and volatility analytics for the monthly returns panel.
+# Everything is computed from cumulative sums of the returns and of their cross-products,
+# so each window length costs two subtractions over the whole panel instead of a pandas .corr() per window.
+
+def rolling_correlations_and_volatilities(returns, windows, annualize: bool = True, dtype=np.float32):
+    """
+    Computes all pairwise rolling correlations and rolling volatilities for every window length in `windows`.
+
+    `returns` is a (time x assets) DataFrame or array of monthly returns with no missing values.
+    Returns (correlations, volatilities) where correlations has shape (windows x time x assets x assets)
+    and volatilities has shape (windows x time x assets). Entry [w, t] describes the window ending at month t,
+    so the first window_length - 1 months of each window are NaN.
+    """
+    values = np.asarray(returns, dtype=np.float64)
+    if values.ndim != 2:
+        raise ValueError(f"Expected a (time x assets) panel, got an array with shape {values.shape}")
+    if np.isnan(values).any():
+        raise ValueError("Returns panel contains missing values. Drop or fill them before computing rolling statistics.")
+
+    windows = [int(w) for w in windows]
+    num_months, num_assets = values.shape
+    for window in windows:
+        if window < 2 or window > num_months:
+            raise ValueError(f"Window length {window} must be between 2 and the number of months ({num_months})")
+
+    # Centre on the full-sample mean first. Correlations and volatilities are unchanged by the shift,
+    # but it keeps the cumulative sums small and avoids cancellation when subtracting them.
+    centred = values - values.mean(axis=0)
+
+    # One pass over the panel: prefix sums with a leading zero row so window sums are S[t + 1] - S[t + 1 - w]
+    cumulative_sums = np.zeros((num_months + 1, num_assets))
+    np.cumsum(centred, axis=0, out=cumulative_sums[1:])
+    cumulative_cross_products = np.zeros((num_months + 1, num_assets, num_assets))
+    np.cumsum(centred[:, :, None] * centred[:, None, :], axis=0, out=cumulative_cross_products[1:])
+
+    correlations = np.full((len(windows), num_months, num_assets, num_assets), np.nan, dtype=dtype)
+    volatilities = np.full((len(windows), num_months, num_assets), np.nan, dtype=dtype)
+
+    for w_idx, window in enumerate(windows):
+        window_sums = cumulative_sums[window:] - cumulative_sums[:-window]
+        window_cross_products = cumulative_cross_products[window:] - cumulative_cross_products[:-window]
+
+        # Sample covariance: (sum(xy) - sum(x) * sum(y) / n) / (n - 1)
+        covariances = (window_cross_products - window_sums[:, :, None] * window_sums[:, None, :] / window) / (window - 1)
+        variances = np.clip(np.diagonal(covariances, axis1=1, axis2=2), 0.0, None)
+        std_devs = np.sqrt(variances)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            window_correlations = covariances / (std_devs[:, :, None] * std_devs[:, None, :])
+        np.clip(window_correlations, -1.0, 1.0, out=window_correlations)
+
+        if annualize:
+            std_devs = std_devs * np.sqrt(num_months_in_year)
+
+        correlations[w_idx, window - 1:] = window_correlations
+        volatilities[w_idx, window - 1:] = std_devs
+
+    return correlations, volatilities
+
+def summarise_rolling_correlations(correlations, windows, asset_names):
+    """
+    Reduces the rolling correlation cube to one row per window length: the mean off-diagonal correlation
+    at the latest month and its minimum / maximum across the sample. Handy for spotting regime changes.
+    """
+    num_assets = len(asset_names)
+    off_diagonal = ~np.eye(num_assets, dtype=bool)
+    rows = []
+    for w_idx, window in enumerate(windows):
+        # Skip the leading months where the window is not yet full
+        average_correlation = correlations[w_idx, window - 1:][:, off_diagonal].mean(axis=1)
+        rows.append({
+            'Window_Months': window,
+            'Latest_Avg_Correlation': average_correlation[-1],
+            'Min_Avg_Correlation': average_correlation.min(),
+            'Max_Avg_Correlation': average_correlation.max(),
+        })
+    return pd.DataFrame(rows).set_index('Window_Months')
@@ -0,0 +1,200 @@
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+from retirement_planner.cache import PortfolioCache, cached_evaluate_portfolios, default_cache_budget, store_data_hash
+from retirement_planner.data import num_months_in_year
+from retirement_planner.evaluate import default_percentiles, evaluate_portfolios, weights_matrix
+from retirement_planner.store import list_simulated_assets, load_simulated_paths
+
+# Long-running local query service over the simulation store.
+# The store is memory-mapped once at start-up. Each HTTP request is handled on its own thread and
+# hands its portfolios to a single batching thread, which waits a few milliseconds to collect
+# concurrent requests with the same parameters and evaluates all of their portfolios in one pass.
+# Per-portfolio results are memoized, so repeated what-if queries skip the store entirely.
+#
+#   POST /query  {"portfolios": [{"AGG": 0.4, "IWDA.L": 0.6}, ...], "horizon_years": 30,
+#                 "withdrawal_rate": 0.04, "percentiles": [5, 50, 95]}
+#   GET  /health
+
+default_host = '127.0.0.1'
+default_port = 8765
+
+class QueryBatcher:
+    """
+    Collects queued queries and evaluates those with identical parameters together.
+    """
+
+    def __init__(self, simulated_asset_paths: dict, asset_names: list, batch_window: float = 0.005, max_batch_portfolios: int = 256,
+                 cache: PortfolioCache = None, data_hash: str = None):
+        self.simulated_asset_paths = simulated_asset_paths
+        self.asset_names = asset_names
+        self.cache = cache
+        self.data_hash = data_hash
+        self.batch_window = batch_window
+        self.max_batch_portfolios = max_batch_portfolios
+        self.pending = queue.Queue()
+        self.batches_evaluated = 0
+        self.worker = threading.Thread(target=self.run, name='query-batcher', daemon=True)
+        self.worker.start()
+
+    def submit(self, weights, horizon_months, withdrawal_rate: float, percentiles) -> Future:
+        future = Future()
+        key = (horizon_months, float(withdrawal_rate), tuple(percentiles))
+        self.pending.put((key, weights, future))
+        return future
+
+    def collect_batch(self):
+        first = self.pending.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.batch_window
+        while sum(len(item[1]) for item in batch) < self.max_batch_portfolios:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self.pending.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is None:
+                self.pending.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def run(self):
+        while True:
+            batch = self.collect_batch()
+            if batch is None:
+                return
+            groups = {}
+            for key, weights, future in batch:
+                groups.setdefault(key, []).append((weights, future))
+            for key, items in groups.items():
+                self.evaluate_group(key, items)
+
+    def evaluate_group(self, key, items):
+        horizon_months, withdrawal_rate, percentiles = key
+        try:
+            weights = np.vstack([weights for weights, _ in items])
+            if self.cache is None:
+                results = evaluate_portfolios(self.simulated_asset_paths, self.asset_names, weights, horizon_months, withdrawal_rate, percentiles)
+            else:
+                results = cached_evaluate_portfolios(self.cache, self.data_hash, self.simulated_asset_paths, self.asset_names, weights,
+                                                     horizon_months, withdrawal_rate, percentiles)
+        except Exception as e:
+            for _, future in items:
+                future.set_exception(e)
+            return
+        self.batches_evaluated += 1
+
+        # Split the batched result back into one slice per request
+        offset = 0
+        for weights, future in items:
+            rows = slice(offset, offset + len(weights))
+            future.set_result({name: value[rows] if isinstance(value, np.ndarray) else value for name, value in results.items()})
+            offset += len(weights)
+
+    def close(self):
+        self.pending.put(None)
+        self.worker.join()
+
+def format_results(results: dict):
+    portfolios = []
+    for i in range(len(results['success_probability'])):
+        portfolios.append({
+            'terminal_wealth_percentiles': dict(zip(map(str, results['percentiles']), results['terminal_wealth_percentiles'][i].tolist())),
+            'success_probability': float(results['success_probability'][i]),
+            'max_drawdown_percentiles': dict(zip(map(str, results['percentiles']), results['max_drawdown_percentiles'][i].tolist())),
+            'median_max_drawdown': float(results['median_max_drawdown'][i]),
+            'worst_max_drawdown': float(results['worst_max_drawdown'][i]),
+        })
+    return {'portfolios': portfolios}
+
+class QueryRequestHandler(BaseHTTPRequestHandler):
+    # Set on the server class by create_server
+    batcher = None
+    store_shape = None
+    quiet = True
+
+    def send_json(self, status: int, body: dict):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path != '/health':
+            self.send_json(404, {'error': f"Unknown path {self.path}"})
+            return
+        num_simulations, num_months = self.store_shape
+        self.send_json(200, {'status': 'ok', 'assets': self.batcher.asset_names, 'simulations': num_simulations,
+                             'months': num_months, 'batches_evaluated': self.batcher.batches_evaluated,
+                             'cache': None if self.batcher.cache is None else self.batcher.cache.stats()})
+
+    def do_POST(self):
+        if self.path != '/query':
+            self.send_json(404, {'error': f"Unknown path {self.path}"})
+            return
+        try:
+            query = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            weights = weights_matrix(query['portfolios'], self.batcher.asset_names)
+            horizon_years = query.get('horizon_years')
+            horizon_months = None if horizon_years is None else int(round(float(horizon_years) * num_months_in_year))
+            percentiles = [float(p) for p in query.get('percentiles', default_percentiles)]
+            future = self.batcher.submit(weights, horizon_months, float(query.get('withdrawal_rate', 0.0)), percentiles)
+            self.send_json(200, format_results(future.result()))
+        except (KeyError, TypeError, ValueError) as e:
+            self.send_json(400, {'error': str(e)})
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+class StoreQueryServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The socketserver default backlog of 5 resets connections under bursts of concurrent clients
+    request_queue_size = 128
+
+def create_server(output_folder: str, host: str = default_host, port: int = default_port, batch_window: float = 0.005, quiet: bool = True,
+                  cache_budget: int = default_cache_budget, cache_folder: str = None):
+    """
+    Memory-maps the store and returns a threaded HTTP server that is ready to serve_forever().
+    Pass port=0 to bind a free port (server.server_address has the one chosen).
+    cache_budget=0 turns off result memoization; cache_folder spills evicted results to disk.
+    """
+    asset_names = list_simulated_assets(output_folder)
+    simulated_asset_paths = load_simulated_paths(output_folder, asset_names, mmap_mode='r')
+    cache, data_hash = None, None
+    if cache_budget > 0:
+        cache = PortfolioCache(cache_budget, cache_folder)
+        data_hash = store_data_hash(simulated_asset_paths, asset_names)
+
+    handler = type('StoreQueryRequestHandler', (QueryRequestHandler,), {
+        'batcher': QueryBatcher(simulated_asset_paths, asset_names, batch_window, cache=cache, data_hash=data_hash),
+        'store_shape': simulated_asset_paths[asset_names[0]].shape,
+        'quiet': quiet,
+    })
+    return StoreQueryServer((host, port), handler)
+
+def serve(output_folder: str, host: str = default_host, port: int = default_port, batch_window: float = 0.005,
+          cache_budget: int = default_cache_budget, cache_folder: str = None):
+    server = create_server(output_folder, host, port, batch_window, quiet=False, cache_budget=cache_budget, cache_folder=cache_folder)
+    print(f"Serving queries over '{output_folder}' on http://{server.server_address[0]}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down.")
+    finally:
+        server.server_close()
+        batcher = server.RequestHandlerClass.batcher
+        batcher.close()
+        if batcher.cache is not None:
+            print(f"Result cache: {batcher.cache.stats()}")
@@ -0,0 +1,269 @@
+import numpy as np
+import hashlib
+import json
+import os
+from retirement_planner.data import num_months_in_year
+from retirement_planner.store import create_simulated_path_files, load_simulated_paths
+
+# Monte Carlo simulation of monthly GBP asset returns.
+#  - 'bootstrap': historical bootstrapping, each simulated month is a randomly drawn historical month (all assets together)
+#  - 'normal' / 't': parametric multivariate normal or Student-t draws whose mean and covariance match the
+#    annualized inputs used for the efficient frontier. Unlike the bootstrap these can produce months
+#    worse than anything in the historical sample.
+#  - 'regime_rate' / 'regime_volatility': conditional bootstrap that follows a Markov chain of BoE base-rate
+#    or trailing-volatility regimes and draws each month from the current regime's historical months (see regimes.py)
+# Every method generates (paths x months x assets) chunks and writes them to the same store format.
+#
+# Runs are checkpointed per chunk: once a chunk is flushed to the store, simulation_checkpoint.json is
+# atomically replaced with the number of finished simulations and the RNG state after that chunk. A rerun
+# with the same configuration (same hash) resumes from there and produces byte-identical files.
+#
+# Large studies can be split into shards: shard k of N simulates its share of the paths from the
+# independent sub-seed SeedSequence(seed).spawn(N)[k] into its own store (shard_<k> under the output
+# folder) and saves mergeable summaries next to it, which the merge command combines.
+
+simulation_methods = ['bootstrap', 'normal', 't', 'regime_rate', 'regime_volatility']
+
+def annualized_inputs(monthly_returns_df):
+    """
+    Annualized expected returns (compounded monthly mean) and covariance matrix (monthly covariance x 12).
+    """
+    expected_returns_annualized = (1 + monthly_returns_df.mean())**num_months_in_year - 1
+    covariance_matrix_annualized = monthly_returns_df.cov() * num_months_in_year
+    return expected_returns_annualized, covariance_matrix_annualized
+
+def monthly_inputs(expected_returns_annualized, covariance_matrix_annualized):
+    """
+    Inverts the annualization: compounded monthly mean and covariance divided by 12 (i.i.d. months).
+    """
+    mean_monthly = (1 + np.asarray(expected_returns_annualized, dtype=np.float64))**(1 / num_months_in_year) - 1
+    covariance_monthly = np.asarray(covariance_matrix_annualized, dtype=np.float64) / num_months_in_year
+    return mean_monthly, covariance_monthly
+
+# Cholesky factors keyed by a hash of the covariance matrix, so repeated runs
+# (e.g. several stress tests on the same inputs) only factorise once per process.
+_cholesky_cache = {}
+
+def covariance_hash(covariance_matrix) -> str:
+    covariance_matrix = np.ascontiguousarray(covariance_matrix, dtype=np.float64)
+    digest = hashlib.sha256(str(covariance_matrix.shape).encode())
+    digest.update(covariance_matrix.tobytes())
+    return digest.hexdigest()
+
+def cholesky_factor(covariance_matrix):
+    key = covariance_hash(covariance_matrix)
+    if key not in _cholesky_cache:
+        try:
+            _cholesky_cache[key] = np.linalg.cholesky(covariance_matrix)
+        except np.linalg.LinAlgError:
+            raise ValueError("Covariance matrix is not positive definite. Check for duplicated or constant asset series.")
+    return _cholesky_cache[key]
+
+def generate_bootstrap_chunk(rng, num_paths: int, num_months: int, historical_returns):
+    """
+    Draws (paths x months) random historical month indices and gathers all assets for each draw,
+    which keeps the cross-asset correlation of every historical month.
+    """
+    random_indices = rng.integers(0, historical_returns.shape[0], size=(num_paths, num_months))
+    return historical_returns[random_indices]
+
+def generate_parametric_chunk(rng, num_paths: int, num_months: int, mean_monthly, chol, distribution: str = 'normal', degrees_of_freedom: float = 5.0):
+    """
+    Generates one (paths x months x assets) block of correlated monthly returns with a single matmul.
+    For the Student-t the normal draws are scaled by sqrt((dof - 2) / chi2) so the covariance is unchanged
+    and only the tails get fatter.
+    """
+    num_assets = len(mean_monthly)
+    shocks = rng.standard_normal((num_paths * num_months, num_assets)) @ chol.T
+    if distribution == 't':
+        if degrees_of_freedom <= 2:
+            raise ValueError("Student-t degrees of freedom must be greater than 2 for the covariance to exist.")
+        mixing = np.sqrt((degrees_of_freedom - 2) / rng.chisquare(degrees_of_freedom, size=num_paths * num_months))
+        shocks *= mixing[:, None]
+    elif distribution != 'normal':
+        raise ValueError(f"Unknown distribution '{distribution}'. Use 'normal' or 't'.")
+    chunk = shocks.reshape(num_paths, num_months, num_assets)
+    chunk += mean_monthly
+    # A monthly return below -100% is not possible for a long-only holding
+    np.maximum(chunk, -1.0, out=chunk)
+    return chunk
+
+regime_methods = ['regime_rate', 'regime_volatility']
+
+def regime_method_index(method: str, monthly_returns_df) -> dict:
+    """
+    Labels every historical month for a regime method and builds its regime index (see regimes.regime_index).
+    """
+    from retirement_planner.regimes import rate_regime_labels, regime_index, volatility_regime_labels
+    if method == 'regime_rate':
+        labels = rate_regime_labels(monthly_returns_df.index)
+    else:
+        labels = volatility_regime_labels(monthly_returns_df)
+    index = regime_index(labels)
+    print(f"Regime bootstrap: {len(index['counts'])} regimes with {index['counts'].tolist()} historical months, "
+          f"starting in regime {index['initial_regime']}")
+    return index
+
+def chunk_generator(method: str, monthly_returns_df, degrees_of_freedom: float = 5.0, index: dict = None):
+    """
+    Returns a function (rng, num_paths, num_months) -> (paths x months x assets) chunk for the given method.
+    Regime methods use `index` if given, otherwise they build it from the history.
+    """
+    if method == 'bootstrap':
+        historical_returns = monthly_returns_df.to_numpy(dtype=np.float64)
+        return lambda rng, num_paths, num_months: generate_bootstrap_chunk(rng, num_paths, num_months, historical_returns)
+    if method in regime_methods:
+        from retirement_planner.regimes import generate_regime_bootstrap_chunk
+        historical_returns = monthly_returns_df.to_numpy(dtype=np.float64)
+        index = regime_method_index(method, monthly_returns_df) if index is None else index
+        return lambda rng, num_paths, num_months: generate_regime_bootstrap_chunk(rng, num_paths, num_months, historical_returns, index)
+    if method in ('normal', 't'):
+        mean_monthly, covariance_monthly = monthly_inputs(*annualized_inputs(monthly_returns_df))
+        chol = cholesky_factor(covariance_monthly)
+        return lambda rng, num_paths, num_months: generate_parametric_chunk(rng, num_paths, num_months, mean_monthly, chol,
+                                                                            method, degrees_of_freedom)
+    raise ValueError(f"Unknown simulation method '{method}'. Choose from {simulation_methods}.")
+
+checkpoint_filename = 'simulation_checkpoint.json'
+
+def simulation_config_hash(monthly_returns_df, num_simulations: int, num_months: int, method: str,
+                           degrees_of_freedom: float, chunk_size: int, seed, index: dict = None) -> str:
+    """
+    Hash of everything that determines the simulated output: the historical data and the run settings.
+    The chunk size is included because chunk boundaries change how the RNG stream is consumed.
+    Regime methods also pass their regime index, so new BoE rates or regime parameters start a new run.
+    """
+    historical_returns = np.ascontiguousarray(monthly_returns_df.to_numpy(dtype=np.float64))
+    if isinstance(seed, np.random.SeedSequence):
+        seed = {'entropy': seed.entropy, 'spawn_key': list(seed.spawn_key)}
+    settings = {'assets': list(map(str, monthly_returns_df.columns)), 'shape': historical_returns.shape,
+                'num_simulations': num_simulations, 'num_months': num_months, 'method': method,
+                'degrees_of_freedom': degrees_of_freedom if method == 't' else None,
+                'chunk_size': chunk_size, 'seed': seed}
+    if index is not None:
+        from retirement_planner import regimes
+        settings['regime_parameters'] = {'rate_thresholds': list(regimes.default_rate_thresholds),
+                                         'volatility_window': regimes.default_volatility_window,
+                                         'volatility_regimes': regimes.default_volatility_regimes,
+                                         'transition_smoothing': regimes.default_transition_smoothing,
+                                         'initial_regime': index['initial_regime']}
+    digest = hashlib.sha256(json.dumps(settings, sort_keys=True).encode())
+    digest.update(historical_returns.tobytes())
+    if index is not None:
+        for name in ('months_by_regime', 'counts', 'transitions'):
+            digest.update(np.ascontiguousarray(index[name]).tobytes())
+    return digest.hexdigest()
+
+def read_checkpoint(output_folder: str):
+    try:
+        with open(os.path.join(output_folder, checkpoint_filename)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def write_checkpoint(output_folder: str, checkpoint: dict):
+    """
+    Writes the checkpoint to a temporary file, syncs it and renames it over the old one, so a crash
+    leaves either the previous or the new checkpoint on disk, never a partial one.
+    """
+    checkpoint_file = os.path.join(output_folder, checkpoint_filename)
+    temporary_file = checkpoint_file + '.tmp'
+    with open(temporary_file, 'w') as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary_file, checkpoint_file)
+
+def remove_checkpoint(output_folder: str):
+    try:
+        os.remove(os.path.join(output_folder, checkpoint_filename))
+    except FileNotFoundError:
+        pass
+
+def simulate_paths(monthly_returns_df, num_simulations: int, num_months: int, output_folder: str, method: str = 'bootstrap',
+                   degrees_of_freedom: float = 5.0, chunk_size: int = 1000, seed=None, resume: bool = True):
+    """
+    Simulates num_simulations paths of num_months and writes them chunk by chunk to output_folder
+    as <asset>_simulated_returns.npy (simulations x months), so memory use is bounded by chunk_size.
+
+    If output_folder holds a checkpoint from an interrupted run with the same configuration, the run
+    continues after the last finished chunk (pass resume=False to always start again).
+    """
+    for name, value in (('num_simulations', num_simulations), ('num_months', num_months), ('chunk_size', chunk_size)):
+        if value <= 0:
+            raise ValueError(f"{name} must be positive, got {value}.")
+    asset_names = list(monthly_returns_df.columns)
+    index = regime_method_index(method, monthly_returns_df) if method in regime_methods else None
+    generate_chunk = chunk_generator(method, monthly_returns_df, degrees_of_freedom, index)
+    rng = np.random.default_rng(seed)
+    config_hash = simulation_config_hash(monthly_returns_df, num_simulations, num_months, method, degrees_of_freedom,
+                                         chunk_size, seed, index)
+
+    checkpoint = read_checkpoint(output_folder) if resume else None
+    # A finished unseeded run is not repeatable, so a rerun draws new paths rather than keeping the old ones
+    if checkpoint is not None and seed is None and checkpoint['completed_simulations'] == num_simulations:
+        checkpoint = None
+    if checkpoint is not None and checkpoint['config_hash'] == config_hash:
+        completed = checkpoint['completed_simulations']
+        rng.bit_generator.state = checkpoint['rng_state']
+        simulated_asset_paths = load_simulated_paths(output_folder, asset_names, mmap_mode='r+')
+        if completed == num_simulations:
+            print(f"'{output_folder}' already holds a finished run with this configuration. Nothing to do.")
+        else:
+            print(f"Resuming from checkpoint: {completed} / {num_simulations} simulations already complete.")
+    else:
+        if checkpoint is not None:
+            print(f"Checkpoint in '{output_folder}' is from a different configuration. Starting a new run.")
+        completed = 0
+        # The old checkpoint must not outlive the files it describes, or a crash before the first chunk of this run
+        # would let a later run "resume" onto the truncated store
+        remove_checkpoint(output_folder)
+        simulated_asset_paths = create_simulated_path_files(output_folder, asset_names, num_simulations, num_months)
+
+    for start in range(completed, num_simulations, chunk_size):
+        stop = min(start + chunk_size, num_simulations)
+        chunk = generate_chunk(rng, stop - start, num_months)
+        for asset_idx, asset_name in enumerate(asset_names):
+            simulated_asset_paths[asset_name][start:stop] = chunk[:, :, asset_idx]
+            simulated_asset_paths[asset_name].flush()
+        # The chunk only counts as finished once its data is on disk
+        write_checkpoint(output_folder, {'config_hash': config_hash, 'completed_simulations': stop,
+                                         'rng_state': rng.bit_generator.state})
+        print(f"Simulations complete: {stop} / {num_simulations}")
+
+    for asset_name, data_array in simulated_asset_paths.items():
+        data_array.flush()
+        print(f"Asset '{asset_name}': Shape of simulated paths is {data_array.shape} (Simulations x Months)")
+    return simulated_asset_paths
+
+def shard_seed(seed: int, shard: int, num_shards: int):
+    if seed is None:
+        raise ValueError("Sharded runs need a seed so every shard draws from the same family of sub-seeds.")
+    if not 0 <= shard < num_shards:
+        raise ValueError(f"Shard must be between 0 and {num_shards - 1}, got {shard}")
+    return np.random.SeedSequence(seed).spawn(num_shards)[shard]
+
+def shard_size(num_simulations: int, shard: int, num_shards: int) -> int:
+    """
+    Simulations in one shard; the first num_simulations % num_shards shards take one extra.
+    """
+    return num_simulations // num_shards + (shard < num_simulations % num_shards)
+
+shard_folder_prefix = 'shard_'
+
+def shard_folder(output_folder: str, shard: int) -> str:
+    return os.path.join(output_folder, f"{shard_folder_prefix}{shard:03d}")
+
+def simulate_shard(monthly_returns_df, num_simulations: int, num_months: int, output_folder: str, shard: int, num_shards: int,
+                   method: str = 'bootstrap', degrees_of_freedom: float = 5.0, chunk_size: int = 1000, seed: int = None, resume: bool = True):
+    """
+    Simulates shard `shard` of `num_shards` (num_simulations is the total over all shards) into
+    shard_<k> under output_folder and writes its summaries there. Returns the shard's folder.
+    """
+    from retirement_planner.summaries import summaries_filename, summarise_store
+    folder = shard_folder(output_folder, shard)
+    simulated_asset_paths = simulate_paths(monthly_returns_df, shard_size(num_simulations, shard, num_shards), num_months, folder,
+                                           method, degrees_of_freedom, chunk_size, shard_seed(seed, shard, num_shards), resume)
+    summarise_store(simulated_asset_paths, sorted(simulated_asset_paths)).save(os.path.join(folder, summaries_filename))
+    print(f"Saved shard {shard} summaries to {os.path.join(folder, summaries_filename)}")
+    return folder
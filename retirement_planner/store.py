@@ -0,0 +1,39 @@
+import numpy as np
+import os
+
+# Shared helpers for the on-disk simulation store.
+# The store is one folder with one (simulations x months) .npy file per asset, named <asset>_simulated_returns.npy.
+
+simulated_returns_suffix = '_simulated_returns.npy'
+
+def simulated_returns_file(output_folder: str, asset_name: str) -> str:
+    return os.path.join(output_folder, f"{asset_name}{simulated_returns_suffix}")
+
+def create_simulated_path_files(output_folder: str, asset_names: list, num_simulations: int, num_months: int, dtype=np.float64):
+    """
+    Creates empty store files and returns them as writable memory maps, so simulations can be written
+    chunk by chunk without holding every path in memory. The result is a normal .npy file once flushed.
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    return {
+        asset_name: np.lib.format.open_memmap(simulated_returns_file(output_folder, asset_name), mode='w+',
+                                              dtype=dtype, shape=(num_simulations, num_months))
+        for asset_name in asset_names
+    }
+
+def list_simulated_assets(output_folder: str) -> list:
+    asset_names = sorted(filename[:-len(simulated_returns_suffix)] for filename in os.listdir(output_folder)
+                         if filename.endswith(simulated_returns_suffix))
+    if not asset_names:
+        raise FileNotFoundError(f"No simulated returns in '{output_folder}'. Run the simulate command first.")
+    return asset_names
+
+def load_simulated_paths(output_folder: str, asset_names: list = None, mmap_mode: str = None) -> dict:
+    """
+    Loads the store into a dictionary of asset name -> array. Pass mmap_mode='r' to memory-map the files
+    instead of reading them into memory.
+    """
+    if asset_names is None:
+        asset_names = list_simulated_assets(output_folder)
+    return {asset_name: np.load(simulated_returns_file(output_folder, asset_name), mmap_mode=mmap_mode)
+            for asset_name in asset_names}
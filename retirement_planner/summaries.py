@@ -0,0 +1,441 @@
+import numpy as np
+from retirement_planner.data import num_months_in_year
+from retirement_planner.evaluate import asset_returns_chunk, default_memory_budget
+
+# Mergeable summaries of simulated returns.
+# Each summary is built block by block and two summaries of disjoint sets of simulations combine into the
+# summary of their union, so shards (or blocks of one store) never need the raw paths of the others.
+#  - MomentSummary: count, mean and central moment sums up to the 4th (pairwise updates of Chan et al. / Pebay)
+#  - CovarianceSummary: mean vector and co-moment matrix (the bivariate Chan update)
+#  - HistogramSketch: counts on fixed, uniform bin edges plus under / overflow and the exact min / max;
+#    quantiles are interpolated within a bin, so their error is at most one bin width
+# Every summary saves to and loads from flat arrays for np.savez.
+
+class MomentSummary:
+    """
+    Running count, mean and central moment sums M2, M3, M4 for each column.
+    """
+
+    def __init__(self, num_columns: int):
+        self.count = 0
+        self.mean = np.zeros(num_columns)
+        self.m2 = np.zeros(num_columns)
+        self.m3 = np.zeros(num_columns)
+        self.m4 = np.zeros(num_columns)
+
+    def update(self, values):
+        """
+        Adds a (observations x columns) block.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        block = MomentSummary(values.shape[1])
+        block.count = values.shape[0]
+        if block.count == 0:
+            return self
+        block.mean = values.mean(axis=0)
+        deviations = values - block.mean
+        squared = deviations**2
+        block.m2 = squared.sum(axis=0)
+        block.m3 = (squared * deviations).sum(axis=0)
+        block.m4 = (squared**2).sum(axis=0)
+        return self.merge(block)
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self.m2, self.m3, self.m4 = other.count, other.mean.copy(), other.m2.copy(), other.m3.copy(), other.m4.copy()
+            return self
+        n_a, n_b = self.count, other.count
+        n = n_a + n_b
+        delta = other.mean - self.mean
+        m2 = self.m2 + other.m2 + delta**2 * n_a * n_b / n
+        m3 = (self.m3 + other.m3 + delta**3 * n_a * n_b * (n_a - n_b) / n**2
+              + 3 * delta * (n_a * other.m2 - n_b * self.m2) / n)
+        m4 = (self.m4 + other.m4 + delta**4 * n_a * n_b * (n_a**2 - n_a * n_b + n_b**2) / n**3
+              + 6 * delta**2 * (n_a**2 * other.m2 + n_b**2 * self.m2) / n**2
+              + 4 * delta * (n_a * other.m3 - n_b * self.m3) / n)
+        self.count, self.mean, self.m2, self.m3, self.m4 = n, self.mean + delta * n_b / n, m2, m3, m4
+        return self
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1)
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+    @property
+    def skewness(self):
+        return np.sqrt(self.count) * self.m3 / self.m2**1.5
+
+    @property
+    def excess_kurtosis(self):
+        return self.count * self.m4 / self.m2**2 - 3
+
+    def to_arrays(self, prefix: str) -> dict:
+        return {f"{prefix}_count": np.array(self.count), f"{prefix}_mean": self.mean, f"{prefix}_m2": self.m2,
+                f"{prefix}_m3": self.m3, f"{prefix}_m4": self.m4}
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix: str):
+        summary = cls(len(arrays[f"{prefix}_mean"]))
+        summary.count = int(arrays[f"{prefix}_count"])
+        for name in ('mean', 'm2', 'm3', 'm4'):
+            setattr(summary, name, np.array(arrays[f"{prefix}_{name}"], dtype=np.float64))
+        return summary
+
+class CovarianceSummary:
+    """
+    Running count, mean vector and co-moment matrix sum((x - mean)(x - mean)^T) across columns.
+    """
+
+    def __init__(self, num_columns: int):
+        self.count = 0
+        self.mean = np.zeros(num_columns)
+        self.comoment = np.zeros((num_columns, num_columns))
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        block = CovarianceSummary(values.shape[1])
+        block.count = values.shape[0]
+        if block.count == 0:
+            return self
+        block.mean = values.mean(axis=0)
+        deviations = values - block.mean
+        block.comoment = deviations.T @ deviations
+        return self.merge(block)
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self.comoment = other.count, other.mean.copy(), other.comoment.copy()
+            return self
+        n = self.count + other.count
+        delta = other.mean - self.mean
+        self.comoment = self.comoment + other.comoment + np.outer(delta, delta) * self.count * other.count / n
+        self.mean = self.mean + delta * other.count / n
+        self.count = n
+        return self
+
+    @property
+    def covariance(self):
+        return self.comoment / (self.count - 1)
+
+    @property
+    def correlation(self):
+        std = np.sqrt(np.diag(self.comoment))
+        return self.comoment / np.outer(std, std)
+
+    def to_arrays(self, prefix: str) -> dict:
+        return {f"{prefix}_count": np.array(self.count), f"{prefix}_mean": self.mean, f"{prefix}_comoment": self.comoment}
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix: str):
+        summary = cls(len(arrays[f"{prefix}_mean"]))
+        summary.count = int(arrays[f"{prefix}_count"])
+        summary.mean = np.array(arrays[f"{prefix}_mean"], dtype=np.float64)
+        summary.comoment = np.array(arrays[f"{prefix}_comoment"], dtype=np.float64)
+        return summary
+
+class HistogramSketch:
+    """
+    Fixed-edge histogram per column on bins uniform over [lower, upper). Counts are int64, so merging is
+    exact and independent of the order shards are combined in.
+    """
+
+    def __init__(self, num_columns: int, lower: float, upper: float, bins: int):
+        self.lower, self.upper, self.bins = float(lower), float(upper), int(bins)
+        # Column layout: [underflow, bins..., overflow]
+        self.counts = np.zeros((num_columns, self.bins + 2), dtype=np.int64)
+        self.minimum = np.full(num_columns, np.inf)
+        self.maximum = np.full(num_columns, -np.inf)
+
+    @property
+    def edges(self):
+        return np.linspace(self.lower, self.upper, self.bins + 1)
+
+    def update(self, values):
+        """
+        Adds a (observations x columns) block with one bincount over every column at once.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if values.shape[0] == 0:
+            return self
+        num_columns = self.counts.shape[0]
+        positions = np.floor((values - self.lower) * (self.bins / (self.upper - self.lower)))
+        bin_index = np.clip(positions, -1, self.bins).astype(np.int64) + 1
+        flat_index = (bin_index + np.arange(num_columns) * (self.bins + 2)).ravel()
+        self.counts += np.bincount(flat_index, minlength=self.counts.size).reshape(self.counts.shape)
+        self.minimum = np.minimum(self.minimum, values.min(axis=0))
+        self.maximum = np.maximum(self.maximum, values.max(axis=0))
+        return self
+
+    def merge(self, other):
+        if (other.lower, other.upper, other.bins) != (self.lower, self.upper, self.bins):
+            raise ValueError("Histogram sketches can only be merged if they share the same bin edges.")
+        self.counts += other.counts
+        self.minimum = np.minimum(self.minimum, other.minimum)
+        self.maximum = np.maximum(self.maximum, other.maximum)
+        return self
+
+    def quantiles(self, percentiles):
+        """
+        Approximate percentiles (0-100) per column: (columns x percentiles). Values in the under / overflow
+        bins are interpolated between the exact min / max and the grid.
+        """
+        fractions = np.asarray(percentiles, dtype=np.float64) / 100
+        edges = self.edges
+        result = np.empty((self.counts.shape[0], len(fractions)))
+        for column, counts in enumerate(self.counts):
+            # Bin boundaries including the under / overflow bins, clamped to the observed range
+            lower_bounds = np.concatenate([[self.minimum[column]], edges])
+            upper_bounds = np.concatenate([edges, [self.maximum[column]]])
+            lower_bounds = np.clip(lower_bounds, self.minimum[column], self.maximum[column])
+            upper_bounds = np.clip(upper_bounds, self.minimum[column], self.maximum[column])
+            cumulative = np.cumsum(counts)
+            targets = fractions * cumulative[-1]
+            bin_index = np.minimum(np.searchsorted(cumulative, targets, side='left'), len(counts) - 1)
+            below = np.where(bin_index > 0, cumulative[bin_index - 1], 0)
+            within = np.divide(targets - below, counts[bin_index], out=np.zeros(len(targets)), where=counts[bin_index] > 0)
+            result[column] = lower_bounds[bin_index] + within * (upper_bounds[bin_index] - lower_bounds[bin_index])
+        return result
+
+    def to_arrays(self, prefix: str) -> dict:
+        return {f"{prefix}_range": np.array([self.lower, self.upper, self.bins]), f"{prefix}_counts": self.counts,
+                f"{prefix}_minimum": self.minimum, f"{prefix}_maximum": self.maximum}
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix: str):
+        lower, upper, bins = arrays[f"{prefix}_range"]
+        sketch = cls(len(arrays[f"{prefix}_minimum"]), lower, upper, int(bins))
+        sketch.counts = np.array(arrays[f"{prefix}_counts"], dtype=np.int64)
+        sketch.minimum = np.array(arrays[f"{prefix}_minimum"], dtype=np.float64)
+        sketch.maximum = np.array(arrays[f"{prefix}_maximum"], dtype=np.float64)
+        return sketch
+
+# Bin grids shared by every shard. Monthly returns cannot fall below -100%.
+monthly_histogram_range = (-1.0, 1.0, 8000)
+annual_histogram_range = (-1.0, 4.0, 10000)
+summaries_filename = 'summaries.npz'
+
+class StoreSummaries:
+    """
+    Per-asset monthly and annual (non-overlapping 12-month block) return moments and histograms,
+    plus the monthly cross-asset covariance, for one store or the merge of several.
+    """
+
+    def __init__(self, asset_names: list):
+        num_assets = len(asset_names)
+        self.asset_names = list(asset_names)
+        self.num_simulations = 0
+        self.monthly_moments = MomentSummary(num_assets)
+        self.monthly_histogram = HistogramSketch(num_assets, *monthly_histogram_range)
+        self.annual_moments = MomentSummary(num_assets)
+        self.annual_histogram = HistogramSketch(num_assets, *annual_histogram_range)
+        self.covariance = CovarianceSummary(num_assets)
+
+    def update(self, asset_returns):
+        """
+        Adds a (simulations x months x assets) block. Months after the last full year only count towards monthly statistics.
+        """
+        num_paths, num_months, num_assets = asset_returns.shape
+        monthly = asset_returns.reshape(-1, num_assets)
+        num_years = num_months // num_months_in_year
+        annual = np.prod(1 + asset_returns[:, :num_years * num_months_in_year].reshape(num_paths, num_years, num_months_in_year, num_assets),
+                         axis=2).reshape(-1, num_assets) - 1
+        self.num_simulations += num_paths
+        self.monthly_moments.update(monthly)
+        self.monthly_histogram.update(monthly)
+        self.annual_moments.update(annual)
+        self.annual_histogram.update(annual)
+        self.covariance.update(monthly)
+        return self
+
+    def merge(self, other):
+        if other.asset_names != self.asset_names:
+            raise ValueError(f"Cannot merge summaries of different assets: {self.asset_names} vs {other.asset_names}")
+        self.num_simulations += other.num_simulations
+        for name in ('monthly_moments', 'monthly_histogram', 'annual_moments', 'annual_histogram', 'covariance'):
+            getattr(self, name).merge(getattr(other, name))
+        return self
+
+    def save(self, file_path: str):
+        arrays = {'asset_names': np.array(self.asset_names), 'num_simulations': np.array(self.num_simulations)}
+        for name in ('monthly_moments', 'monthly_histogram', 'annual_moments', 'annual_histogram', 'covariance'):
+            arrays.update(getattr(self, name).to_arrays(name))
+        np.savez(file_path, **arrays)
+
+    @classmethod
+    def load(cls, file_path: str):
+        with np.load(file_path) as arrays:
+            summaries = cls([str(name) for name in arrays['asset_names']])
+            summaries.num_simulations = int(arrays['num_simulations'])
+            summaries.monthly_moments = MomentSummary.from_arrays(arrays, 'monthly_moments')
+            summaries.monthly_histogram = HistogramSketch.from_arrays(arrays, 'monthly_histogram')
+            summaries.annual_moments = MomentSummary.from_arrays(arrays, 'annual_moments')
+            summaries.annual_histogram = HistogramSketch.from_arrays(arrays, 'annual_histogram')
+            summaries.covariance = CovarianceSummary.from_arrays(arrays, 'covariance')
+        return summaries
+
+    def table(self, percentiles=(5, 50, 95)):
+        """
+        One row per asset: annualized mean / volatility from the monthly moments, monthly skew and kurtosis,
+        and annual return percentiles from the sketch.
+        """
+        import pandas as pd
+        table = pd.DataFrame({
+            'Ann_Mean_Return': (1 + self.monthly_moments.mean)**num_months_in_year - 1,
+            'Ann_Volatility': self.monthly_moments.std * np.sqrt(num_months_in_year),
+            'Monthly_Skew': self.monthly_moments.skewness,
+            'Monthly_Excess_Kurtosis': self.monthly_moments.excess_kurtosis,
+            'Annual_Mean_Return': self.annual_moments.mean,
+        }, index=pd.Index(self.asset_names, name='Asset'))
+        annual_quantiles = self.annual_histogram.quantiles(percentiles)
+        for i, percentile in enumerate(percentiles):
+            table[f"Annual_P{percentile:g}"] = annual_quantiles[:, i]
+        return table
+
+# Terminal wealth spans many orders of magnitude over long horizons, so it is sketched in log space
+terminal_log_wealth_range = (-30.0, 30.0, 60000)
+
+class PortfolioSummaries:
+    """
+    Per-portfolio monthly return moments, annual return moments and histogram, terminal wealth histogram
+    (in log space) and the histogram of each path's worst rolling window return for every window length.
+    Portfolios are rebalanced monthly; an identity weight matrix gives the same statistics per asset.
+    """
+
+    def __init__(self, portfolio_names: list, window_years=(10,)):
+        num_portfolios = len(portfolio_names)
+        self.portfolio_names = list(portfolio_names)
+        self.window_years = list(window_years)
+        self.monthly_moments = MomentSummary(num_portfolios)
+        self.annual_moments = MomentSummary(num_portfolios)
+        self.annual_histogram = HistogramSketch(num_portfolios, *annual_histogram_range)
+        self.terminal_log_wealth = HistogramSketch(num_portfolios, *terminal_log_wealth_range)
+        self.worst_windows = {years: HistogramSketch(num_portfolios, *annual_histogram_range) for years in self.window_years}
+
+    def update(self, portfolio_returns, log_indexes: list = None):
+        """
+        Adds a (simulations x months x portfolios) block of monthly returns. log_indexes optionally holds,
+        per portfolio, the block's rows of a stored log-return index (or None to build it from the returns).
+        """
+        from retirement_planner.path_index import build_log_return_index, worst_rolling_returns
+        num_paths, num_months, num_portfolios = portfolio_returns.shape
+        num_years = num_months // num_months_in_year
+        self.monthly_moments.update(portfolio_returns.reshape(-1, num_portfolios))
+        annual = np.prod(1 + portfolio_returns[:, :num_years * num_months_in_year].reshape(num_paths, num_years, num_months_in_year, num_portfolios),
+                         axis=2).reshape(-1, num_portfolios) - 1
+        self.annual_moments.update(annual)
+        self.annual_histogram.update(annual)
+
+        # (portfolios x simulations x months + 1) log index, one row per path
+        index = np.empty((num_portfolios * num_paths, num_months + 1))
+        for p in range(num_portfolios):
+            stored = log_indexes[p] if log_indexes is not None else None
+            index[p * num_paths:(p + 1) * num_paths] = build_log_return_index(portfolio_returns[:, :, p]) if stored is None else stored
+        self.terminal_log_wealth.update(index[:, -1].reshape(num_portfolios, num_paths).T)
+        for years in self.window_years:
+            if years * num_months_in_year <= num_months:
+                worst = worst_rolling_returns(index, years * num_months_in_year, annualize=True)
+                self.worst_windows[years].update(worst.reshape(num_portfolios, num_paths).T)
+        return self
+
+    def table(self, percentiles=(5, 50, 95)):
+        import pandas as pd
+        table = pd.DataFrame({
+            'Ann_Mean_Return': (1 + self.monthly_moments.mean)**num_months_in_year - 1,
+            'Ann_Volatility': self.monthly_moments.std * np.sqrt(num_months_in_year),
+            'Annual_Mean_Return': self.annual_moments.mean,
+        }, index=pd.Index(self.portfolio_names, name='Portfolio'))
+        annual_quantiles = self.annual_histogram.quantiles(percentiles)
+        terminal_quantiles = np.exp(self.terminal_log_wealth.quantiles(percentiles))
+        for i, percentile in enumerate(percentiles):
+            table[f"Annual_P{percentile:g}"] = annual_quantiles[:, i]
+        for i, percentile in enumerate(percentiles):
+            table[f"Terminal_Wealth_P{percentile:g}"] = terminal_quantiles[:, i]
+        for years, sketch in self.worst_windows.items():
+            if sketch.counts.sum():
+                worst_quantiles = sketch.quantiles([5, 50])
+                table[f"Worst_{years}y_Ann_P5"] = worst_quantiles[:, 0]
+                table[f"Worst_{years}y_Ann_P50"] = worst_quantiles[:, 1]
+        return table
+
+def simulation_blocks(simulated_asset_paths: dict, asset_names: list, bytes_per_path: int, memory_budget: int = default_memory_budget):
+    """
+    Yields (start, stop, (chunk x months x assets) block) over aligned blocks of simulations of every asset,
+    sized so that about bytes_per_path per simulation stays within memory_budget.
+    """
+    num_simulations, num_months = simulated_asset_paths[asset_names[0]].shape
+    chunk_size = max(1, int(memory_budget // bytes_per_path))
+    for start in range(0, num_simulations, chunk_size):
+        stop = min(start + chunk_size, num_simulations)
+        yield start, stop, asset_returns_chunk(simulated_asset_paths, asset_names, start, stop, num_months)
+
+def summarise_store(simulated_asset_paths: dict, asset_names: list, memory_budget: int = default_memory_budget,
+                    portfolio_weights=None, portfolio_names: list = None, window_years=(10,), portfolio_log_indexes: list = None):
+    """
+    Builds the summaries of a store in one pass over aligned blocks of simulations, so at most about
+    memory_budget bytes of paths and temporaries are in memory at once. With a (portfolios x assets)
+    portfolio_weights matrix it returns (StoreSummaries, PortfolioSummaries), otherwise just the StoreSummaries.
+    portfolio_log_indexes optionally gives each portfolio's stored (simulations x months + 1) log-return
+    index (e.g. from path_index.load_log_index), or None for the ones to build from the block.
+    """
+    num_months = simulated_asset_paths[asset_names[0]].shape[1]
+    summaries = StoreSummaries(asset_names)
+    portfolio_summaries = None
+    num_portfolios = 0
+    if portfolio_weights is not None:
+        portfolio_weights = np.atleast_2d(np.asarray(portfolio_weights, dtype=np.float64))
+        num_portfolios = portfolio_weights.shape[0]
+        portfolio_names = portfolio_names or [f"Portfolio_{i+1}" for i in range(num_portfolios)]
+        portfolio_summaries = PortfolioSummaries(portfolio_names, window_years)
+
+    # The asset block with its annual compounding and histogram temporaries, plus portfolio returns and their log index
+    bytes_per_path = 8 * (num_months + 1) * (4 * len(asset_names) + 4 * num_portfolios)
+    for start, stop, block in simulation_blocks(simulated_asset_paths, asset_names, bytes_per_path, memory_budget):
+        summaries.update(block)
+        if portfolio_summaries is not None:
+            block_log_indexes = None if portfolio_log_indexes is None else [
+                None if index is None else index[start:stop] for index in portfolio_log_indexes]
+            portfolio_summaries.update(block @ portfolio_weights.T, block_log_indexes)
+    return summaries if portfolio_summaries is None else (summaries, portfolio_summaries)
+
+def historical_comparison(summaries: StoreSummaries, historical_returns_df):
+    """
+    Simulated versus historical annualized mean and volatility per asset, and simulated versus historical
+    correlation for every asset pair. Returns (moments DataFrame, correlations DataFrame).
+    """
+    import pandas as pd
+    historical = historical_returns_df[summaries.asset_names]
+    moments = pd.DataFrame({
+        'Simulated_Ann_Mean': (1 + summaries.monthly_moments.mean)**num_months_in_year - 1,
+        'Historical_Ann_Mean': ((1 + historical.mean())**num_months_in_year - 1).to_numpy(),
+        'Simulated_Ann_Volatility': summaries.monthly_moments.std * np.sqrt(num_months_in_year),
+        'Historical_Ann_Volatility': (historical.std() * np.sqrt(num_months_in_year)).to_numpy(),
+    }, index=pd.Index(summaries.asset_names, name='Asset'))
+
+    simulated_correlation = summaries.covariance.correlation
+    historical_correlation = historical.corr().to_numpy()
+    first, second = np.triu_indices(len(summaries.asset_names), k=1)
+    correlations = pd.DataFrame({
+        'Asset_1': np.array(summaries.asset_names)[first], 'Asset_2': np.array(summaries.asset_names)[second],
+        'Simulated': simulated_correlation[first, second], 'Historical': historical_correlation[first, second],
+    })
+    correlations['Difference'] = correlations['Simulated'] - correlations['Historical']
+    return moments, correlations
+
+def merge_summaries(summary_files: list) -> StoreSummaries:
+    """
+    Combines saved summaries in the order given (sorted shard order gives reproducible floating point results).
+    """
+    merged = None
+    for file_path in summary_files:
+        summaries = StoreSummaries.load(file_path)
+        merged = summaries if merged is None else merged.merge(summaries)
+    if merged is None:
+        raise ValueError("No summary files to merge.")
+    return merged
@@ -0,0 +1,14 @@
+import numpy as np
+import pytest
+
+@pytest.fixture
+def simulated_store():
+    """
+    Small in-memory store: 400 paths x 60 months of three assets with different means and volatilities.
+    """
+    rng = np.random.default_rng(7)
+    asset_names = ['Bonds', 'Cash', 'Equity']
+    means = {'Bonds': 0.003, 'Cash': 0.001, 'Equity': 0.006}
+    volatilities = {'Bonds': 0.015, 'Cash': 0.001, 'Equity': 0.045}
+    simulated_asset_paths = {name: rng.normal(means[name], volatilities[name], (400, 60)) for name in asset_names}
+    return simulated_asset_paths, asset_names
@@ -0,0 +1,31 @@
+import numpy as np
+from retirement_planner.cache import PortfolioCache, cached_evaluate_portfolios, store_data_hash
+from retirement_planner.evaluate import evaluate_portfolios
+
+def test_cached_results_match_uncached_for_off_grid_weights(simulated_store):
+    simulated_asset_paths, asset_names = simulated_store
+    weights = np.array([[0.123456, 0.3, 0.576544], [1 / 3, 1 / 3, 1 / 3], [0.123456, 0.3, 0.576544]])
+    cache = PortfolioCache(weight_decimals=2)
+    data_hash = store_data_hash(simulated_asset_paths, asset_names)
+
+    uncached = evaluate_portfolios(simulated_asset_paths, asset_names, weights, withdrawal_rate=0.04)
+    first = cached_evaluate_portfolios(cache, data_hash, simulated_asset_paths, asset_names, weights, withdrawal_rate=0.04)
+    second = cached_evaluate_portfolios(cache, data_hash, simulated_asset_paths, asset_names, weights, withdrawal_rate=0.04)
+
+    for results in (first, second):
+        for name, value in uncached.items():
+            if isinstance(value, np.ndarray):
+                np.testing.assert_array_equal(results[name], value)
+    stats = cache.stats()
+    assert stats['misses'] == 3 and stats['hits'] == 3 and stats['entries'] == 2
+
+def test_spilled_entries_are_reloaded(simulated_store, tmp_path):
+    simulated_asset_paths, asset_names = simulated_store
+    weights = np.eye(3)
+    cache = PortfolioCache(memory_budget=1, spill_folder=str(tmp_path))
+    data_hash = store_data_hash(simulated_asset_paths, asset_names)
+
+    first = cached_evaluate_portfolios(cache, data_hash, simulated_asset_paths, asset_names, weights)
+    second = cached_evaluate_portfolios(cache, data_hash, simulated_asset_paths, asset_names, weights)
+    np.testing.assert_array_equal(first['terminal_wealth_percentiles'], second['terminal_wealth_percentiles'])
+    assert cache.stats()['disk_hits'] > 0
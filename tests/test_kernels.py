@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from retirement_planner import kernels
+
+needs_numba = pytest.mark.skipif(not kernels.numba_available(), reason='numba is not installed')
+
+@pytest.fixture
+def returns():
+    rng = np.random.default_rng(4)
+    asset_returns = rng.normal(0.004, 0.04, (200, 120, 3))
+    return asset_returns, asset_returns @ np.array([0.2, 0.3, 0.5])
+
+def loop_threshold_rebalance(asset_returns, target_weights, band, cost_rate):
+    """
+    Plain month loop for one portfolio, the definition the kernels implement.
+    """
+    num_simulations, num_months, _ = asset_returns.shape
+    growth = np.ones(num_simulations)
+    net = np.ones(num_simulations)
+    for s in range(num_simulations):
+        weights = target_weights.copy()
+        for m in range(num_months):
+            weights = weights * (1 + asset_returns[s, m])
+            gross = weights.sum()
+            weights = weights / gross
+            growth[s] *= gross
+            net[s] *= gross
+            if m < num_months - 1 and np.abs(weights - target_weights).max() > band:
+                net[s] *= 1 - cost_rate * np.abs(weights - target_weights).sum()
+                weights = target_weights.copy()
+    return growth, net
+
+def test_numpy_threshold_rebalance_matches_month_loop(returns):
+    asset_returns, _ = returns
+    target_weights = np.array([0.2, 0.3, 0.5])
+    growth, cost_factor, _, _ = kernels.threshold_rebalance(asset_returns, target_weights, 0.05, 0.001, backend='numpy')
+    expected_growth, expected_net = loop_threshold_rebalance(asset_returns, target_weights, 0.05, 0.001)
+    np.testing.assert_allclose(growth[:, 0], expected_growth, rtol=1e-12)
+    np.testing.assert_allclose(growth[:, 0] * cost_factor[:, 0], expected_net, rtol=1e-12)
+
+@needs_numba
+def test_threshold_rebalance_backends_match(returns):
+    asset_returns, _ = returns
+    target_weights = np.array([[0.2, 0.3, 0.5], [0.6, 0.2, 0.2]])
+    for band in (0.0, 0.05):
+        numpy_results = kernels.threshold_rebalance(asset_returns, target_weights, band, 0.001, backend='numpy')
+        numba_results = kernels.threshold_rebalance(asset_returns, target_weights, band, 0.001, backend='numba')
+        for numpy_result, numba_result in zip(numpy_results, numba_results):
+            np.testing.assert_array_equal(numpy_result, numba_result)
+
+@needs_numba
+def test_guardrail_withdrawals_backends_match(returns):
+    _, portfolio_returns = returns
+    for initial_rate in (0.04, 0.3):
+        numpy_results = kernels.guardrail_withdrawals(portfolio_returns, initial_rate, backend='numpy')
+        numba_results = kernels.guardrail_withdrawals(portfolio_returns, initial_rate, backend='numba')
+        for numpy_result, numba_result in zip(numpy_results, numba_results):
+            np.testing.assert_array_equal(numpy_result, numba_result)
+
+@needs_numba
+def test_drawdown_recovery_backends_match(returns):
+    _, portfolio_returns = returns
+    numpy_results = kernels.drawdown_recovery(portfolio_returns, backend='numpy')
+    numba_results = kernels.drawdown_recovery(portfolio_returns, backend='numba')
+    for numpy_result, numba_result in zip(numpy_results, numba_results):
+        np.testing.assert_array_equal(numpy_result, numba_result)
+
+def test_guardrail_depletion_is_reported(returns):
+    _, portfolio_returns = returns
+    terminal_wealth, _, _, depleted_month = kernels.guardrail_withdrawals(portfolio_returns, 0.5, adjustment=0.0, backend='numpy')
+    assert (depleted_month >= 0).any()
+    assert (terminal_wealth[depleted_month >= 0] == 0).all()
@@ -0,0 +1,16 @@
+import numpy as np
+import pytest
+from retirement_planner.optimize import risk_band_portfolios, solve_scenario_portfolio
+
+def test_min_cvar_weights_are_fully_invested_within_max_weight():
+    scenarios = np.random.default_rng(3).normal(0.05, [0.02, 0.1, 0.2], (500, 3))
+    weights, info = solve_scenario_portfolio(scenarios, 'min_cvar', max_weight=0.5)
+    assert weights is not None
+    assert weights.sum() == pytest.approx(1.0)
+    assert weights.max() <= 0.5 + 1e-9
+
+def test_infeasible_max_weight_raises_for_the_band(simulated_store):
+    simulated_asset_paths, asset_names = simulated_store
+    with pytest.raises(ValueError, match='Risk level 1: .*minimum-CVaR fallback failed'):
+        risk_band_portfolios(simulated_asset_paths, asset_names, max_scenarios=500, drawdown_paths=5,
+                             drawdown_months=12, max_weight=0.2, seed=1)
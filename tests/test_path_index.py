@@ -0,0 +1,19 @@
+import numpy as np
+import pytest
+from retirement_planner.path_index import build_log_return_index, rolling_window_returns, worst_rolling_returns
+
+def test_worst_rolling_returns_matches_rolling_window_minimum(simulated_store):
+    simulated_asset_paths, _ = simulated_store
+    index = build_log_return_index(simulated_asset_paths['Equity'])
+    for window_months in (1, 12, 60):
+        np.testing.assert_allclose(worst_rolling_returns(index, window_months, annualize=True),
+                                   rolling_window_returns(index, window_months, annualize=True).min(axis=1))
+
+@pytest.mark.parametrize('window_months', [0, -12, 61, 120])
+def test_window_that_does_not_fit_raises(simulated_store, window_months):
+    simulated_asset_paths, _ = simulated_store
+    index = build_log_return_index(simulated_asset_paths['Equity'])
+    with pytest.raises(ValueError, match='does not fit in a 60 month horizon'):
+        worst_rolling_returns(index, window_months)
+    with pytest.raises(ValueError, match='does not fit in a 60 month horizon'):
+        rolling_window_returns(index, window_months)
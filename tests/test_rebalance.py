@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+from retirement_planner.kernels import threshold_rebalance
+from retirement_planner.rebalance import calendar_rebalance, parse_policy
+
+@pytest.fixture
+def asset_returns():
+    return np.random.default_rng(9).normal(0.004, 0.04, (300, 30, 3))
+
+def test_no_rebalance_at_the_horizon_end(asset_returns):
+    weights = np.array([[0.2, 0.3, 0.5]])
+    # 30 months: annual rebalances after months 12 and 24 only
+    _, cost_factor, _, rebalances = calendar_rebalance(asset_returns, weights, 12, 0.01)
+    assert (rebalances == 2).all()
+    # Months 25-30 add no trades, so the costs equal those of a 25-month horizon (also rebalanced after 12 and 24)
+    np.testing.assert_allclose(cost_factor, calendar_rebalance(asset_returns[:, :25], weights, 12, 0.01)[1])
+    # Monthly rebalancing trades 29 times over 30 months
+    assert (calendar_rebalance(asset_returns, weights, 1, 0.01)[3] == 29).all()
+
+def test_monthly_calendar_matches_zero_band(asset_returns):
+    weights = np.array([[0.2, 0.3, 0.5], [0.5, 0.5, 0.0]])
+    calendar = calendar_rebalance(asset_returns, weights, 1, 0.002)
+    band = threshold_rebalance(asset_returns, weights, 0.0, 0.002, backend='numpy')
+    for calendar_result, band_result in zip(calendar, band):
+        np.testing.assert_allclose(calendar_result, band_result, rtol=1e-10, atol=1e-12)
+
+def test_bad_policies_raise():
+    with pytest.raises(ValueError, match='numeric width'):
+        parse_policy('band:x')
+    with pytest.raises(ValueError, match='Unknown rebalancing policy'):
+        parse_policy('weekly')
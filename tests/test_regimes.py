@@ -0,0 +1,30 @@
+import numpy as np
+from retirement_planner.regimes import regime_buckets, simulate_regime_chain, transition_matrix
+
+def stationary_distribution(transitions):
+    eigenvalues, eigenvectors = np.linalg.eig(transitions.T)
+    stationary = np.real(eigenvectors[:, np.argmin(np.abs(eigenvalues - 1))])
+    return stationary / stationary.sum()
+
+def test_stationary_distribution_matches_empirical_frequencies():
+    # Long spell in regime 0, a short pass through 1, then 2 until the end of the history (as with BoE rates)
+    labels = np.array([0] * 120 + [1] * 6 + [2] * 30)
+    labels, _, counts, _ = regime_buckets(labels)
+    transitions = transition_matrix(labels, len(counts))
+    np.testing.assert_allclose(transitions.sum(axis=1), 1.0)
+    np.testing.assert_allclose(stationary_distribution(transitions), counts / counts.sum(), atol=1e-12)
+    # The last regime is not absorbing
+    assert transitions[2, 2] < 1
+
+def test_regime_without_transitions_stays_put():
+    transitions = transition_matrix(np.array([0, 0, 1, 1]), 3, circular=False)
+    np.testing.assert_array_equal(transitions[2], [0, 0, 1])
+    np.testing.assert_array_equal(transitions[1], [0, 1, 0])
+
+def test_simulated_chain_visits_regimes_at_empirical_frequencies():
+    labels = np.array([0] * 120 + [1] * 6 + [2] * 30)
+    labels, _, counts, _ = regime_buckets(labels)
+    transitions = transition_matrix(labels, len(counts))
+    regimes = simulate_regime_chain(np.random.default_rng(0), 2000, 600, transitions, initial_regime=2)
+    frequencies = np.bincount(regimes[:, 300:].ravel(), minlength=len(counts)) / regimes[:, 300:].size
+    np.testing.assert_allclose(frequencies, counts / counts.sum(), atol=0.03)
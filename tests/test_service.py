@@ -0,0 +1,59 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pytest
+from retirement_planner.evaluate import evaluate_portfolios
+from retirement_planner.service import create_server
+from retirement_planner.store import create_simulated_path_files
+
+@pytest.fixture
+def server(simulated_store, tmp_path):
+    simulated_asset_paths, asset_names = simulated_store
+    store = create_simulated_path_files(str(tmp_path), asset_names, *simulated_asset_paths[asset_names[0]].shape)
+    for asset_name in asset_names:
+        store[asset_name][:] = simulated_asset_paths[asset_name]
+        store[asset_name].flush()
+    server = create_server(str(tmp_path), port=0, batch_window=0.05, cache_budget=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    server.RequestHandlerClass.batcher.close()
+
+def post(server, body: bytes):
+    host, port = server.server_address
+    request = urllib.request.Request(f"http://{host}:{port}/query", data=body, headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+def test_concurrent_queries_are_batched_and_match_evaluate_portfolios(server, simulated_store):
+    simulated_asset_paths, asset_names = simulated_store
+    rng = np.random.default_rng(2)
+    weights = rng.dirichlet(np.ones(len(asset_names)), 16)
+    bodies = [json.dumps({'portfolios': [dict(zip(asset_names, row))], 'horizon_years': 4, 'withdrawal_rate': 0.04,
+                          'percentiles': [5, 50, 95]}).encode() for row in weights]
+    with ThreadPoolExecutor(len(bodies)) as pool:
+        responses = list(pool.map(lambda body: post(server, body), bodies))
+
+    expected = evaluate_portfolios(simulated_asset_paths, asset_names, weights, 48, 0.04, [5, 50, 95])
+    for i, (status, body) in enumerate(responses):
+        assert status == 200
+        portfolio = body['portfolios'][0]
+        np.testing.assert_allclose(list(portfolio['terminal_wealth_percentiles'].values()), expected['terminal_wealth_percentiles'][i])
+        assert portfolio['success_probability'] == pytest.approx(expected['success_probability'][i])
+        assert portfolio['median_max_drawdown'] == pytest.approx(expected['median_max_drawdown'][i])
+    assert server.RequestHandlerClass.batcher.batches_evaluated < len(bodies)
+
+@pytest.mark.parametrize('body', [b'{not json', json.dumps({'portfolios': [{'Unknown': 1.0}]}).encode(),
+                                  json.dumps({'portfolios': [{'Bonds': 0.7}]}).encode(), json.dumps({}).encode()])
+def test_malformed_queries_get_400(server, body):
+    status, response = post(server, body)
+    assert status == 400
+    assert response['error']
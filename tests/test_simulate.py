@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+from retirement_planner import simulate
+from retirement_planner.store import list_simulated_assets, simulated_returns_file
+
+@pytest.fixture
+def monthly_returns_df():
+    rng = np.random.default_rng(11)
+    dates = pd.date_range('2010-01-01', periods=120, freq='MS')
+    return pd.DataFrame(rng.normal(0.005, 0.03, (120, 3)), index=dates, columns=['Bonds', 'Cash', 'Equity'])
+
+def store_bytes(folder):
+    return {asset_name: open(simulated_returns_file(folder, asset_name), 'rb').read() for asset_name in list_simulated_assets(folder)}
+
+def run(monthly_returns_df, folder, **kwargs):
+    settings = {'num_simulations': 50, 'num_months': 24, 'output_folder': str(folder), 'chunk_size': 20, 'seed': 5}
+    settings.update(kwargs)
+    return simulate.simulate_paths(monthly_returns_df, **settings)
+
+def test_resumed_run_matches_uninterrupted_run(monthly_returns_df, tmp_path, monkeypatch):
+    run(monthly_returns_df, tmp_path / 'whole')
+
+    write_checkpoint = simulate.write_checkpoint
+    def crash_after_first_chunk(output_folder, checkpoint):
+        if checkpoint['completed_simulations'] > 20:
+            raise KeyboardInterrupt
+        write_checkpoint(output_folder, checkpoint)
+    monkeypatch.setattr(simulate, 'write_checkpoint', crash_after_first_chunk)
+    with pytest.raises(KeyboardInterrupt):
+        run(monthly_returns_df, tmp_path / 'resumed')
+    assert simulate.read_checkpoint(str(tmp_path / 'resumed'))['completed_simulations'] == 20
+
+    monkeypatch.setattr(simulate, 'write_checkpoint', write_checkpoint)
+    run(monthly_returns_df, tmp_path / 'resumed')
+    assert store_bytes(tmp_path / 'resumed') == store_bytes(tmp_path / 'whole')
+
+def test_new_run_that_crashes_leaves_no_stale_checkpoint(monthly_returns_df, tmp_path, monkeypatch):
+    run(monthly_returns_df, tmp_path)
+    finished = store_bytes(tmp_path)
+
+    def crash(rng, num_paths, num_months, historical_returns):
+        raise KeyboardInterrupt
+    monkeypatch.setattr(simulate, 'generate_bootstrap_chunk', crash)
+    with pytest.raises(KeyboardInterrupt):
+        run(monthly_returns_df, tmp_path, resume=False)
+    with pytest.raises(KeyboardInterrupt):
+        run(monthly_returns_df, tmp_path, num_months=12)
+    assert simulate.read_checkpoint(str(tmp_path)) is None
+
+    monkeypatch.undo()
+    run(monthly_returns_df, tmp_path)
+    assert store_bytes(tmp_path) == finished
@@ -0,0 +1,9 @@
+import numpy as np
+from retirement_planner.summaries import PortfolioSummaries
+
+def test_window_equal_to_the_horizon_is_reported():
+    portfolio_returns = np.random.default_rng(0).normal(0.005, 0.03, (200, 120, 1))
+    table = PortfolioSummaries(['Portfolio'], window_years=(10,)).update(portfolio_returns).table()
+    # The only 10-year window is the whole path, so the worst window is the annualized total return
+    annualized = np.expm1(np.log1p(portfolio_returns[:, :, 0]).sum(axis=1) / 10)
+    assert abs(table.loc['Portfolio', 'Worst_10y_Ann_P50'] - np.median(annualized)) < 2e-3